@@ -11,6 +11,23 @@ s3 = boto3.client("s3")
 BUCKET = os.environ["SCP_BUCKET"]
 
 
+def _cache_validated_rego(generate_result):
+    cache_key = generate_result.get("cache_key")
+    rego = generate_result.get("generated_rego")
+    if not (cache_key and rego):
+        return
+    try:
+        s3.put_object(
+            Bucket=BUCKET,
+            Key=cache_key,
+            Body=rego.encode("utf-8"),
+            ContentType="text/plain"
+        )
+    except ClientError as e:
+        # the policy itself is stored; a missing cache entry only costs a regeneration
+        logger.warning("Could not cache validated rego: %s", e)
+
+
 def lambda_handler(event, context):
     """
     Stores SCP JSON into S3 for CreatePolicy / UpdatePolicy events.
@@ -20,8 +37,12 @@ def lambda_handler(event, context):
         "policyId": "p-123456",
         "policyName": "MyPolicy",
         "timestamp": "...",
-        "policyContent": "{...raw JSON string...}"
+        "policyContent": "{...raw JSON string...}",
+        "generateResult": {"generated_rego": "...", "cache_key": "..."}
     }
+
+    Runs only after the generated Rego has passed validation, so it is also
+    where the Rego is written to the generation cache (when cache_key is set).
     """
 
     logger.info("Received event: %s", json.dumps(event))
@@ -65,6 +86,8 @@ def lambda_handler(event, context):
 
     logger.info("Stored SCP %s at s3://%s/%s", policy_id, BUCKET, key)
 
+    _cache_validated_rego(event.get("generateResult") or {})
+
     return {
         "status": "OK",
         "action": "STORE",
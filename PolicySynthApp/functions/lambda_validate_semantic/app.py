@@ -1,20 +1,49 @@
 import json
 import boto3
-import random
-import time
-from botocore.exceptions import ClientError, BotoCoreError, EndpointConnectionError
+from botocore.config import Config
 import logging
 import traceback
 import os
 import subprocess
 import tempfile
+import hashlib
+from collections import OrderedDict
 import re
 
-client = boto3.client("bedrock-runtime", region_name = "us-east-1")
-s3 = boto3.client("s3")
+# module-level so warm invocations reuse the client and its pooled,
+# kept-alive HTTPS connections; adaptive retries handle throttling and
+# connection errors
+client = boto3.client(
+    "bedrock-runtime",
+    region_name = "us-east-1",
+    config = Config(
+        max_pool_connections=50,
+        tcp_keepalive=True,
+        retries={"max_attempts": 6, "mode": "adaptive"},
+    )
+)
+# terraform plans and test suites; same pooled, kept-alive connections
+s3 = boto3.client(
+    "s3",
+    config=Config(max_pool_connections=50, tcp_keepalive=True,
+                  retries={"mode": "adaptive", "max_attempts": 3})
+)
+
+# configured once per container instead of on every invocation
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    logger.addHandler(_handler)
+logger.setLevel(logging.INFO)
 
 model_id = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
 
+# Bedrock responses by sha256(model + prompt), kept for the container's lifetime
+# so warm invocations and retries with an identical prompt skip the model call
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "128"))
+_RESPONSE_CACHE = OrderedDict()
+
 # OPA binary path
 OPA_PATH = "/opt/bin/opa"
 
@@ -27,55 +56,30 @@ ENABLE_TERRAFORM_EVAL = os.getenv("ENABLE_TERRAFORM_EVAL", "true").lower() == "t
 TERRAFORM_TESTS_BUCKET = os.getenv("TERRAFORM_TESTS_BUCKET", TERRAFORM_PLAN_BUCKET)
 TERRAFORM_TESTS_PREFIX = os.getenv("TERRAFORM_TESTS_PREFIX", "terraform-tests")
 
+# fenced code block in LLM output; dotall makes it match all characters
+_FENCE_RE = re.compile(r"```(?:\w+)?\s*\n(.*?)```", re.DOTALL)
+
+
 def strip_fenced_code(text): 
     """Remove markdown code fences from LLM output"""
     if not text:
         return text
     text = text.strip()
+    if "```" not in text:
+        # model already followed the no-markdown instruction
+        return text
     
-    pattern = r"```(?:\w+)?\s*\n(.*?)```"
-    match = re.search(pattern, text, re.DOTALL)
+    match = _FENCE_RE.search(text)
 
     if match:
         return match.group(1).strip()
 
     return text.strip()
 
-def _call_with_backoff(func, *args, max_retries=6, base_delay=0.5, **kwargs):
-    logger = logging.getLogger(__name__)
-    for attempt in range(1, max_retries + 1):
-        try:
-            logger.debug("_call_with_backoff attempt %d", attempt)
-            return func(*args, **kwargs)
-        except ClientError as e:
-            code = e.response.get("Error", {}).get("Code", "")
-            logger.warning("ClientError on attempt %d: %s", attempt, code)
-            if code in ("ThrottlingException", "TooManyRequestsException", "Throttling"):
-                headers = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {}) or {}
-                ra = headers.get("retry-after") or headers.get("Retry-After")
-                if ra:
-                    try:
-                        sleep = float(ra)
-                    except Exception:
-                        sleep = random.uniform(0, base_delay * (2 ** (attempt - 1)))
-                else:
-                    sleep = random.uniform(0, base_delay * (2 ** (attempt - 1)))
-                logger.info("Sleeping %.3fs before retry (attempt %d)", sleep, attempt)
-                time.sleep(sleep)
-                continue
-            raise
-        except (BotoCoreError, EndpointConnectionError) as e:
-            sleep = random.uniform(0, base_delay * (2 ** (attempt - 1)))
-            logger.warning("Transient error on attempt %d: %s. Sleeping %.3fs", attempt, str(e), sleep)
-            time.sleep(sleep)
-            continue
-    logger.error("Max retries exceeded for API call after %d attempts", max_retries)
-    raise Exception("Max retries exceeded for API call")
-
-
 def build_prompt(inputscp, previous_rego="", validation_errors="", relax_corner_cases=True): 
     # Format SCP as JSON string for better readability
-    scp_str = json.dumps(inputscp, indent=2) if isinstance(inputscp, dict) else str(inputscp)
+    # compact JSON: indentation only costs input tokens
+    scp_str = json.dumps(inputscp, separators=(",", ":")) if isinstance(inputscp, dict) else str(inputscp)
     
     prompt = f"""Compare the following SCP and Rego policy for semantic equivalence.
     Identify mismatches in allowed/denied actions, resources, and condition blocks.
@@ -421,17 +425,10 @@ def run_terraform_test_suite(rego_code: str):
 
 def lambda_handler(event,context): 
     try: 
-        # Configure logger for the Lambda invocation
-        logger = logging.getLogger(__name__)
-        if not logger.handlers:
-            handler = logging.StreamHandler()
-            fmt = logging.Formatter('%(asctime)s %(levelname)s %(name)s %(message)s')
-            handler.setFormatter(fmt)
-            logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-
         logger.info("lambda_handler invoked")
-        logger.info("Incoming event: %s", json.dumps(event, default=str))
+        # serializing the event (SCP and Rego included) is only worth it when debugging
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Incoming event (truncated): %s", json.dumps(event, default=str)[:2000])
 
         terraform_non_compliant = False
         terraform_non_compliance_details = ""
@@ -472,25 +469,35 @@ def lambda_handler(event,context):
         # Avoid logging the full prompt if it's huge; log a truncated preview
         logger.debug("Built prompt preview: %s", prompt[:2000])
 
-        logger.info("Calling Bedrock converse API (modelId=%s)", model_id)
-        response = _call_with_backoff(
-            client.converse,
-            modelId=model_id,
-            messages=[{
-                "role": "user",
-                "content": [{"text": prompt}]
-            }],
-            inferenceConfig={
-                "maxTokens": 8192  # max length of response
-            }
-        )
+        cache_key = hashlib.sha256(f"{model_id}\0{prompt}".encode("utf-8")).hexdigest()
+        response = _RESPONSE_CACHE.get(cache_key)
+        if response is not None:
+            _RESPONSE_CACHE.move_to_end(cache_key)
+            logger.info("Reusing Bedrock response for an identical prompt")
+        else:
+            logger.info("Calling Bedrock converse API (modelId=%s)", model_id)
+            response = client.converse(
+                modelId=model_id,
+                messages=[{
+                    "role": "user",
+                    "content": [{"text": prompt}]
+                }],
+                inferenceConfig={
+                    "maxTokens": 8192  # max length of response
+                }
+            )
+            if RESPONSE_CACHE_SIZE > 0:
+                _RESPONSE_CACHE[cache_key] = response
+                if len(_RESPONSE_CACHE) > RESPONSE_CACHE_SIZE:
+                    _RESPONSE_CACHE.popitem(last=False)
 
-        try:
-            logger.info("Bedrock response keys: %s", list(response.keys()))
-            # Log truncated JSON-safe representation of response
-            logger.debug("Bedrock response (truncated): %s", json.dumps(response, default=str)[:2000])
-        except Exception:
-            logger.debug("Bedrock response present but could not be JSON-serialized")
+        if logger.isEnabledFor(logging.DEBUG):
+            try:
+                logger.debug("Bedrock response keys: %s", list(response.keys()))
+                # Log truncated JSON-safe representation of response
+                logger.debug("Bedrock response (truncated): %s", json.dumps(response, default=str)[:2000])
+            except Exception:
+                logger.debug("Bedrock response present but could not be JSON-serialized")
 
         # Safely extract response content
         content = response.get("output", {}).get("message", {}).get("content", [])
@@ -556,7 +563,6 @@ def lambda_handler(event,context):
         }
     except Exception as e:
         # Log full stack trace to CloudWatch logs for debugging
-        logger = logging.getLogger(__name__)
         logger.exception("Error in lambda function: %s", str(e))
         tb = traceback.format_exc()
         logger.debug("Stack trace: %s", tb)
@@ -1,13 +1,18 @@
 import json 
 import boto3
+from botocore.config import Config
 import os
 import subprocess
 import tempfile
 import logging
 import sys
 
-# fetch input data for opa eval
-s3 = boto3.client("s3")
+# fetch input data for opa eval; kept-alive connections are reused by warm invocations
+s3 = boto3.client(
+    "s3",
+    config=Config(max_pool_connections=50, tcp_keepalive=True,
+                  retries={"mode": "adaptive", "max_attempts": 3})
+)
 
 # logger setup
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
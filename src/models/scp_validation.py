@@ -17,17 +17,194 @@ Process:
 4. Comprehensive test case generation
 """
 
+import asyncio
+import hashlib
+import http.client
 import json
+import logging
 import subprocess
+import sys
 import os
+import shutil
+import socket
+import tarfile
 import tempfile
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+import time
+import traceback
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 import glob
+from itertools import islice
 from pathlib import Path
 import re
 
+logger = logging.getLogger(__name__)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler writing to the current sys.stdout, even if it is replaced later."""
+    
+    @property
+    def stream(self):
+        return sys.stdout
+    
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+# Validation progress and per-policy summaries. They are the validator's
+# normal output, so they go to stdout without any logging setup; callers
+# can remove this handler, add their own, or set propagate = True
+progress_logger = logging.getLogger(f"{__name__}.progress")
+progress_logger.addHandler(_StdoutHandler())
+progress_logger.setLevel(logging.INFO)
+progress_logger.propagate = False
+
+try:
+    import orjson
+except ImportError:  # optional speedup, falls back to the stdlib json module
+    orjson = None
+
+try:
+    from opa_wasm import OPAPolicy
+except ImportError:  # optional in-process backend, falls back to the OPA CLI
+    OPAPolicy = None
+
+# slots=True needs Python 3.10+; older interpreters get plain dataclasses
+_DATACLASS_OPTIONS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _json_loads(data):
+    """Decode JSON from str or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    """Encode an object as compact UTF-8 JSON, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _canonical_json(obj: Any) -> bytes:
+    """Encode an object as JSON with sorted keys, for hashing and deduplication."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+
+# An OPA input document, or the same document already encoded by _canonical_json
+OPAInput = Union[Dict[str, Any], bytes]
+
+
+def _input_bytes(input_data: OPAInput) -> bytes:
+    """Encode an OPA input document, passing already-encoded JSON through."""
+    if isinstance(input_data, bytes):
+        return input_data
+    return _json_dumps(input_data)
+
+
+def _input_document(input_data: OPAInput) -> Dict[str, Any]:
+    """Decode an OPA input document for backends that need Python objects."""
+    if isinstance(input_data, bytes):
+        return _json_loads(input_data)
+    return input_data
+
+
+def _batch_payload(inputs: List[OPAInput]) -> bytes:
+    """Encode {"cases": inputs} by splicing each encoded input, without re-encoding."""
+    return b'{"cases":[' + b','.join(_input_bytes(input_data) for input_data in inputs) + b']}'
+
+
+def _content_hash(text: str) -> str:
+    """Hex SHA-256 of a text, used to key per-policy files and caches."""
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _normalize_to_list(value: Any) -> List[str]:
+    """Normalize a value to a list of strings."""
+    if isinstance(value, str):
+        return [value]
+    elif isinstance(value, list):
+        return value
+    return []
+
+
+def _wildcard_to_regex(pattern: str) -> str:
+    """Translate an AWS wildcard pattern (* any characters, ? one character) to regex source."""
+    return re.escape(pattern).replace(r'\*', r'.*').replace(r'\?', r'.')
+
+
+@lru_cache(maxsize=4096)
+def _wildcard_regex(pattern: str) -> re.Pattern:
+    """
+    Compile an AWS wildcard pattern (* matches any characters, ? one character) for fullmatch.
+    
+    Uses the same flags as _union_regex so both agree on values containing newlines.
+    """
+    return re.compile(_wildcard_to_regex(pattern), re.DOTALL)
+
+
+def _union_regex(patterns: List[str]) -> re.Pattern:
+    """Compile a list of AWS wildcard patterns into one alternation for fullmatch."""
+    return _union_regex_for(tuple(patterns))
+
+
+@lru_cache(maxsize=4096)
+def _union_regex_for(patterns: Tuple[str, ...]) -> re.Pattern:
+    """Memoized body of _union_regex; pattern lists recur across statements and policies."""
+    if not patterns:
+        return re.compile(r'(?!)')  # matches nothing, like any() over no patterns
+    alternatives = '|'.join(_wildcard_to_regex(p) for p in patterns)
+    return re.compile(f'(?:{alternatives})', re.DOTALL)
+
+
+@lru_cache(maxsize=4096)
+def _wildcard_matcher(pattern: str) -> Callable[[str], bool]:
+    """
+    Build a predicate for an AWS wildcard pattern.
+    
+    The common shapes (literal, 'prefix*', '*suffix', '*infix*') are
+    answered with str methods; anything else uses the compiled regex.
+    """
+    if pattern == '*':
+        return lambda value: True
+    if '?' not in pattern:
+        stars = pattern.count('*')
+        if stars == 0:
+            return lambda value: value == pattern
+        if stars == 1 and pattern.endswith('*'):
+            prefix = pattern[:-1]
+            return lambda value: value.startswith(prefix)
+        if stars == 1 and pattern.startswith('*'):
+            suffix = pattern[1:]
+            return lambda value: value.endswith(suffix)
+        if stars == 2 and pattern.startswith('*') and pattern.endswith('*'):
+            infix = pattern[1:-1]
+            return lambda value: infix in value
+    regex = _wildcard_regex(pattern)
+    return lambda value: regex.fullmatch(value) is not None
+
+
+@lru_cache(maxsize=8192)
+def _matches_wildcard(value: str, pattern: str) -> bool:
+    """
+    Match a value against an AWS wildcard pattern.
+    
+    Memoized: the generator probes the same few values against the same
+    policy patterns over and over.
+    """
+    return _wildcard_matcher(pattern)(value)
+
 
 class Effect(Enum):
     """Policy effect types."""
@@ -35,6 +212,12 @@ class Effect(Enum):
     DENY = "Deny"
 
 
+# Integer effect codes used inside CompiledPolicy; Effect stays the public type
+_EFFECT_ALLOW = 0
+_EFFECT_DENY = 1
+_EFFECT_CODES = {Effect.ALLOW.value: _EFFECT_ALLOW, Effect.DENY.value: _EFFECT_DENY}
+
+
 class Decision(Enum):
     """Policy decision results."""
     ALLOW = "Allow"
@@ -49,7 +232,7 @@ class RegoResultType(Enum):
     DENY_BOOL = "deny_bool"    # true = Deny, false = Allow
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class TestCase:
     """Represents a single test case for policy validation."""
     action: str
@@ -58,6 +241,7 @@ class TestCase:
     context: Dict[str, Any] = field(default_factory=dict)
     expected_effect: Effect = Effect.DENY
     description: str = ""
+    _opa_input_bytes: Optional[bytes] = field(default=None, init=False, repr=False, compare=False)
 
     def to_opa_input(self) -> Dict[str, Any]:
         """
@@ -72,9 +256,21 @@ class TestCase:
             "principal": self.principal,
             "context": self.context
         }
+    
+    @property
+    def opa_input_bytes(self) -> bytes:
+        """
+        Canonical JSON encoding of to_opa_input(), computed once.
+        
+        Used both as the deduplication/cache key and as the document sent
+        to OPA, so a test case must not be modified once this is read.
+        """
+        if self._opa_input_bytes is None:
+            self._opa_input_bytes = _canonical_json(self.to_opa_input())
+        return self._opa_input_bytes
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class SyntaxCheckResult:
     """Result of Rego syntax validation."""
     valid: bool
@@ -82,7 +278,7 @@ class SyntaxCheckResult:
     warnings: List[str] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ComparisonResult:
     """Result of comparing SCP and Rego behavior."""
     test_case: TestCase
@@ -92,7 +288,7 @@ class ComparisonResult:
     details: str = ""
 
 
-@dataclass
+@dataclass(**_DATACLASS_OPTIONS)
 class ValidationReport:
     """Complete validation report for a policy."""
     policy_name: str
@@ -123,14 +319,15 @@ class ValidationReport:
         
         if self.failed_tests > 0:
             summary.append(f"\n[Failed Tests]")
-            for result in self.comparison_results:
-                if not result.match:
-                    summary.append(f"\n  Test: {result.test_case.description}")
-                    summary.append(f"    Action: {result.test_case.action}")
-                    summary.append(f"    Resource: {result.test_case.resource}")
-                    summary.append(f"    SCP Decision: {result.scp_decision.value}")
-                    summary.append(f"    Rego Decision: {result.rego_decision.value}")
-                    summary.append(f"    Details: {result.details}")
+            summary.extend(
+                f"\n  Test: {result.test_case.description}\n"
+                f"    Action: {result.test_case.action}\n"
+                f"    Resource: {result.test_case.resource}\n"
+                f"    SCP Decision: {result.scp_decision.value}\n"
+                f"    Rego Decision: {result.rego_decision.value}\n"
+                f"    Details: {result.details}"
+                for result in self.comparison_results if not result.match
+            )
         
         summary.append(f"\n{'='*60}\n")
         return "\n".join(summary)
@@ -142,11 +339,7 @@ class TestCaseGenerator:
     @staticmethod
     def normalize_to_list(value: Any) -> List[str]:
         """Normalize a value to a list of strings."""
-        if isinstance(value, str):
-            return [value]
-        elif isinstance(value, list):
-            return value
-        return []
+        return _normalize_to_list(value)
     
     def generate_from_scp(self, scp_json: Dict[str, Any]) -> List[TestCase]:
         """
@@ -158,8 +351,21 @@ class TestCaseGenerator:
         Returns:
             List of test cases
         """
-        test_cases = []
+        return list(self.iter_from_scp(scp_json))
+    
+    def iter_from_scp(self, scp_json: Dict[str, Any]) -> Iterator[TestCase]:
+        """
+        Lazily generate test cases from an SCP policy.
         
+        Yields the same cases, in the same order, as generate_from_scp
+        without holding them all in memory.
+        
+        Args:
+            scp_json: SCP policy document
+            
+        Yields:
+            Test cases one at a time
+        """
         statements = scp_json.get('Statement', [])
         if not isinstance(statements, list):
             statements = [statements]
@@ -192,30 +398,28 @@ class TestCaseGenerator:
             conditions = statement.get('Condition', {})
             
             if has_action or (not has_action and not has_not_action):
-                test_cases.extend(self._generate_positive_cases(
+                yield from self._generate_positive_cases(
                     idx, effect, actions, resources, conditions
-                ))
+                )
             
             if has_not_action:
-                test_cases.extend(self._generate_not_action_cases(
+                yield from self._generate_not_action_cases(
                     idx, effect, not_actions, resources, conditions
-                ))
+                )
             
             if has_not_resource:
-                test_cases.extend(self._generate_not_resource_cases(
+                yield from self._generate_not_resource_cases(
                     idx, effect, actions if has_action else ['*'], not_resources, conditions
-                ))
+                )
             
-            test_cases.extend(self._generate_negative_cases(
+            yield from self._generate_negative_cases(
                 idx, effect, actions, resources, has_action, has_resource
-            ))
+            )
             
             if conditions:
-                test_cases.extend(self._generate_condition_cases(
+                yield from self._generate_condition_cases(
                     idx, effect, actions if has_action else ['*'], resources, conditions
-                ))
-        
-        return test_cases
+                )
     
     def _generate_positive_cases(
         self, 
@@ -224,38 +428,35 @@ class TestCaseGenerator:
         actions: List[str],
         resources: List[str],
         conditions: Dict[str, Any]
-    ) -> List[TestCase]:
+    ) -> Iterator[TestCase]:
         """Generate test cases that should match the policy."""
-        cases = []
         
         if actions and resources:
             action = actions[0] if not actions[0].endswith('*') else self._expand_wildcard_action(actions[0])
             resource = resources[0] if not resources[0].endswith('*') else self._expand_wildcard_resource(resources[0])
             
-            cases.append(TestCase(
+            yield TestCase(
                 action=action,
                 resource=resource,
                 expected_effect=effect,
                 description=f"Statement {stmt_idx}: Positive case - should match policy"
-            ))
+            )
         
         if '*' in actions:
-            cases.append(TestCase(
+            yield TestCase(
                 action="s3:GetObject",
                 resource=resources[0] if resources else "*",
                 expected_effect=effect,
                 description=f"Statement {stmt_idx}: Wildcard action test"
-            ))
+            )
         
         if '*' in resources:
-            cases.append(TestCase(
+            yield TestCase(
                 action=actions[0] if actions else "s3:GetObject",
                 resource="arn:aws:s3:::example-bucket/*",
                 expected_effect=effect,
                 description=f"Statement {stmt_idx}: Wildcard resource test"
-            ))
-        
-        return cases
+            )
     
     def _generate_not_action_cases(
         self,
@@ -264,32 +465,29 @@ class TestCaseGenerator:
         not_actions: List[str],
         resources: List[str],
         conditions: Dict[str, Any]
-    ) -> List[TestCase]:
+    ) -> Iterator[TestCase]:
         """
         Generate test cases for NotAction.
         
         NotAction means the statement applies to actions NOT in the list.
         """
-        cases = []
         
         test_action = "ec2:DescribeInstances"
-        if test_action not in not_actions and not any(self._matches_pattern(test_action, na) for na in not_actions):
-            cases.append(TestCase(
+        if test_action not in not_actions and _union_regex(not_actions).fullmatch(test_action) is None:
+            yield TestCase(
                 action=test_action,
                 resource=resources[0] if resources else "*",
                 expected_effect=effect,
                 description=f"Statement {stmt_idx}: NotAction case - action not in exclusion list"
-            ))
+            )
         
         if not_actions:
-            cases.append(TestCase(
+            yield TestCase(
                 action=not_actions[0],
                 resource=resources[0] if resources else "*",
                 expected_effect=Effect.DENY,
                 description=f"Statement {stmt_idx}: NotAction case - action in exclusion list"
-            ))
-        
-        return cases
+            )
     
     def _generate_not_resource_cases(
         self,
@@ -298,32 +496,29 @@ class TestCaseGenerator:
         actions: List[str],
         not_resources: List[str],
         conditions: Dict[str, Any]
-    ) -> List[TestCase]:
+    ) -> Iterator[TestCase]:
         """
         Generate test cases for NotResource.
         
         NotResource means the statement applies to resources NOT in the list.
         """
-        cases = []
         
         test_resource = "arn:aws:s3:::test-bucket/*"
-        if test_resource not in not_resources and not any(self._matches_pattern(test_resource, nr) for nr in not_resources):
-            cases.append(TestCase(
+        if test_resource not in not_resources and _union_regex(not_resources).fullmatch(test_resource) is None:
+            yield TestCase(
                 action=actions[0] if actions and actions[0] != '*' else "s3:GetObject",
                 resource=test_resource,
                 expected_effect=effect,
                 description=f"Statement {stmt_idx}: NotResource case - resource not in exclusion list"
-            ))
+            )
         
         if not_resources:
-            cases.append(TestCase(
+            yield TestCase(
                 action=actions[0] if actions and actions[0] != '*' else "s3:GetObject",
                 resource=not_resources[0],
                 expected_effect=Effect.DENY,
                 description=f"Statement {stmt_idx}: NotResource case - resource in exclusion list"
-            ))
-        
-        return cases
+            )
     
     def _generate_negative_cases(
         self,
@@ -333,32 +528,29 @@ class TestCaseGenerator:
         resources: List[str],
         has_action: bool,
         has_resource: bool
-    ) -> List[TestCase]:
+    ) -> Iterator[TestCase]:
         """Generate test cases that should NOT match the policy."""
-        cases = []
         expected_effect = Effect.DENY
         
         if has_action and actions and '*' not in actions:
             test_action = "ec2:TerminateInstances"
-            if not any(self._matches_pattern(test_action, a) for a in actions):
-                cases.append(TestCase(
+            if _union_regex(actions).fullmatch(test_action) is None:
+                yield TestCase(
                     action=test_action,
                     resource=resources[0] if resources else "*",
                     expected_effect=expected_effect,
                     description=f"Statement {stmt_idx}: Negative case - different action"
-                ))
+                )
         
         if has_resource and resources and '*' not in resources:
             test_resource = "arn:aws:s3:::unrelated-bucket/*"
-            if not any(self._matches_pattern(test_resource, r) for r in resources):
-                cases.append(TestCase(
+            if _union_regex(resources).fullmatch(test_resource) is None:
+                yield TestCase(
                     action=actions[0] if actions else "s3:GetObject",
                     resource=test_resource,
                     expected_effect=expected_effect,
                     description=f"Statement {stmt_idx}: Negative case - different resource"
-                ))
-        
-        return cases
+                )
     
     def _generate_condition_cases(
         self,
@@ -367,34 +559,41 @@ class TestCaseGenerator:
         actions: List[str],
         resources: List[str],
         conditions: Dict[str, Any]
-    ) -> List[TestCase]:
-        """Generate test cases for condition evaluation."""
-        cases = []
+    ) -> Iterator[TestCase]:
+        """
+        Generate test cases for condition evaluation.
+        
+        Operators on the same condition key often produce the same context
+        (every "not satisfied" case for a key does), so a context already
+        generated for this statement is not generated again.
+        """
+        action = actions[0] if actions and actions[0] != '*' else "s3:GetObject"
+        resource = resources[0] if resources else "*"
+        seen = set()
         
         for condition_type, condition_block in conditions.items():
             for condition_key, condition_values in condition_block.items():
                 if isinstance(condition_values, list):
-                    context = {condition_key: condition_values[0]}
+                    satisfied = {condition_key: condition_values[0]}
                 else:
-                    context = {condition_key: condition_values}
-                
-                cases.append(TestCase(
-                    action=actions[0] if actions and actions[0] != '*' else "s3:GetObject",
-                    resource=resources[0] if resources else "*",
-                    context=context,
-                    expected_effect=effect,
-                    description=f"Statement {stmt_idx}: Condition satisfied - {condition_type}:{condition_key}"
-                ))
+                    satisfied = {condition_key: condition_values}
                 
-                cases.append(TestCase(
-                    action=actions[0] if actions and actions[0] != '*' else "s3:GetObject",
-                    resource=resources[0] if resources else "*",
-                    context={condition_key: "wrong-value-12345"},
-                    expected_effect=Effect.DENY,
-                    description=f"Statement {stmt_idx}: Condition not satisfied - {condition_type}:{condition_key}"
-                ))
-        
-        return cases
+                for context, expected_effect, outcome in [
+                    (satisfied, effect, "satisfied"),
+                    ({condition_key: "wrong-value-12345"}, Effect.DENY, "not satisfied")
+                ]:
+                    signature = _canonical_json(context)
+                    if signature in seen:
+                        continue
+                    seen.add(signature)
+                    
+                    yield TestCase(
+                        action=action,
+                        resource=resource,
+                        context=context,
+                        expected_effect=expected_effect,
+                        description=f"Statement {stmt_idx}: Condition {outcome} - {condition_type}:{condition_key}"
+                    )
     
     def _expand_wildcard_action(self, action: str) -> str:
         """Convert wildcard action to a concrete example."""
@@ -439,11 +638,84 @@ class TestCaseGenerator:
         Returns:
             True if value matches pattern
         """
-        if pattern == '*':
-            return True
-        
-        regex_pattern = re.escape(pattern).replace(r'\*', r'.*')
-        return re.match(f'^{regex_pattern}$', value) is not None
+        return _matches_wildcard(value, pattern)
+
+
+def _oneshot_opa_env() -> Dict[str, str]:
+    """
+    Environment for short-lived 'opa check' / 'opa eval' processes.
+    
+    Each process does milliseconds of work, so the Go runtime's garbage
+    collector only costs time (GOGC=off), and one OS thread per process
+    avoids oversubscribing cores when evaluations run concurrently
+    (GOMAXPROCS=1). Values already set in the environment win. Not used
+    for the long-lived server.
+    """
+    return {"GOGC": "off", "GOMAXPROCS": "1", **os.environ}
+
+
+def _interpret_deny_set(value: Any) -> Decision:
+    """DENY_SET: a non-empty set/object of messages is Deny; empty or undefined is Allow."""
+    if value is None:
+        return Decision.ALLOW
+    
+    if isinstance(value, (list, dict)):
+        return Decision.DENY if value else Decision.ALLOW
+    
+    logger.debug("DENY_SET mode expects list/dict, got %s: %r", type(value).__name__, value)
+    return Decision.ERROR
+
+
+def _interpret_allow_bool(value: Any) -> Decision:
+    """ALLOW_BOOL: true is Allow, false is Deny; anything else is an error."""
+    # Strict type checking for boolean
+    if not isinstance(value, bool):
+        logger.debug(
+            "ALLOW_BOOL mode expects boolean, got %s: %r. "
+            "Hint: your Rego should return 'true' or 'false', not a collection, "
+            "e.g. allow := true if { ... }",
+            type(value).__name__, value
+        )
+        return Decision.ERROR
+    
+    return Decision.ALLOW if value is True else Decision.DENY
+
+
+def _interpret_deny_bool(value: Any) -> Decision:
+    """DENY_BOOL: true is Deny, false is Allow; anything else is an error."""
+    # Strict type checking for boolean
+    if not isinstance(value, bool):
+        logger.debug(
+            "DENY_BOOL mode expects boolean, got %s: %r. "
+            "Hint: your Rego should return 'true' or 'false', not a collection, "
+            "e.g. deny := true if { ... }",
+            type(value).__name__, value
+        )
+        return Decision.ERROR
+    
+    return Decision.DENY if value is True else Decision.ALLOW
+
+
+# Result type -> interpreter of one query value
+_RESULT_INTERPRETERS: Dict[RegoResultType, Callable[[Any], Decision]] = {
+    RegoResultType.DENY_SET: _interpret_deny_set,
+    RegoResultType.ALLOW_BOOL: _interpret_allow_bool,
+    RegoResultType.DENY_BOOL: _interpret_deny_bool,
+}
+
+
+def _result_interpreter(result_type: RegoResultType) -> Callable[[Any], Decision]:
+    """Look up the interpreter for a result type, once per call or batch."""
+    interpret = _RESULT_INTERPRETERS.get(result_type)
+    if interpret is None:
+        raise ValueError(f"Unknown result_type: {result_type}")
+    return interpret
+
+
+# OPA executables already verified by _check_opa_available in this process,
+# mapped to their 'opa version' output. Dict get and set are atomic, so no
+# lock is needed for threaded use.
+_OPA_VERSIONS: Dict[str, str] = {}
 
 
 class OPARunner:
@@ -452,7 +724,8 @@ class OPARunner:
     def __init__(self, 
                  opa_path: str = "opa",
                  default_query: str = "data.aws.scp.deny",
-                 result_type: RegoResultType = RegoResultType.DENY_SET):
+                 result_type: RegoResultType = RegoResultType.DENY_SET,
+                 cache_dir: Optional[str] = None):
         """
         Initialize OPA runner.
         
@@ -460,14 +733,33 @@ class OPARunner:
             opa_path: Path to OPA executable
             default_query: Default OPA query to execute
             result_type: How to interpret Rego results
+            cache_dir: Directory to persist syntax checks and decisions in
+                       (in-memory only if None)
         """
         self.opa_path = opa_path
         self.default_query = default_query
         self.result_type = result_type
+        self.cache_dir = cache_dir
+        self._oneshot_env = _oneshot_opa_env()
+        self._scratch_dir = None
+        self._policy_files: Dict[str, str] = {}
+        # sha256(rego) -> SyntaxCheckResult
+        self._syntax_cache: Dict[str, SyntaxCheckResult] = {}
+        # _decision_key(...) -> Decision; errors are never cached
+        self._decision_cache: Dict[str, Decision] = {}
+        # 'opa version' output, used to invalidate the persisted cache
+        self.opa_version = ""
         self._check_opa_available()
+        if cache_dir:
+            self._load_cache()
     
     def _check_opa_available(self):
-        """Check if OPA is available."""
+        """Check if OPA is available. Each opa_path is only checked once per process."""
+        version = _OPA_VERSIONS.get(self.opa_path)
+        if version is not None:
+            self.opa_version = version
+            return
+        
         try:
             result = subprocess.run(
                 [self.opa_path, "version"],
@@ -481,10 +773,119 @@ class OPARunner:
             raise RuntimeError(f"OPA executable not found at {self.opa_path}")
         except Exception as e:
             raise RuntimeError(f"Error checking OPA availability: {e}")
+        
+        self.opa_version = _OPA_VERSIONS[self.opa_path] = result.stdout.strip()
+    
+    def _policy_file(self, rego_code: str) -> str:
+        """
+        Return a .rego file holding rego_code, writing it at most once.
+        
+        Files live in a per-runner scratch directory keyed by content hash,
+        so repeated checks and evaluations of the same policy reuse one file
+        instead of creating and unlinking a temp file per call. The
+        directory is removed when the runner is garbage collected.
+        """
+        digest = _content_hash(rego_code)
+        path = self._policy_files.get(digest)
+        if path is not None:
+            return path
+        
+        if self._scratch_dir is None:
+            self._scratch_dir = tempfile.mkdtemp(prefix="scp_validation_")
+            weakref.finalize(self, shutil.rmtree, self._scratch_dir, True)
+        
+        # Write under a unique name and rename, so concurrent callers never
+        # see a partially written policy
+        fd, temp_path = tempfile.mkstemp(dir=self._scratch_dir, suffix=".tmp")
+        try:
+            data = rego_code.encode()
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+        
+        path = os.path.join(self._scratch_dir, f"{digest[:16]}.rego")
+        os.replace(temp_path, path)
+        self._policy_files[digest] = path
+        return path
+    
+    def _cache_file(self) -> str:
+        """Path of the persisted cache inside cache_dir."""
+        return os.path.join(self.cache_dir, "opa_cache.json")
+    
+    def _load_cache(self):
+        """
+        Load persisted syntax checks and decisions.
+        
+        A missing or corrupt file is ignored, and so is a cache written by a
+        different OPA version, since its results may no longer hold.
+        """
+        try:
+            with open(self._cache_file(), 'rb') as f:
+                data = _json_loads(f.read())
+            if data.get("opa_version", "") != self.opa_version:
+                logger.debug("Ignoring OPA cache %s written by another OPA version", self._cache_file())
+                return
+            for digest, entry in data.get("syntax", {}).items():
+                self._syntax_cache[digest] = SyntaxCheckResult(
+                    valid=entry["valid"], error_message=entry["error_message"]
+                )
+            for key, decision in data.get("decisions", {}).items():
+                self._decision_cache[key] = Decision(decision)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug("Ignoring unreadable OPA cache %s: %s", self._cache_file(), e)
+    
+    def save_cache(self):
+        """Persist syntax checks and decisions to cache_dir, if one is configured."""
+        if not self.cache_dir:
+            return
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = {
+            "opa_version": self.opa_version,
+            "syntax": {
+                digest: {"valid": result.valid, "error_message": result.error_message}
+                for digest, result in list(self._syntax_cache.items())
+            },
+            "decisions": {key: decision.value for key, decision in list(self._decision_cache.items())}
+        }
+        temp_path = self._cache_file() + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(_json_dumps(data))
+        os.replace(temp_path, self._cache_file())
+    
+    @staticmethod
+    def _decision_key(policy_digest: str, query: str, result_type: RegoResultType,
+                      input_data: OPAInput) -> str:
+        """Cache key for one evaluation: policy, query, result type and canonical input."""
+        key = hashlib.sha256(f"{policy_digest}\0{query}\0{result_type.value}\0".encode())
+        key.update(input_data if isinstance(input_data, bytes) else _canonical_json(input_data))
+        return key.hexdigest()
+    
+    def prepare(self, rego_code: str, query: str = None):
+        """
+        Do per-policy setup once, before any test case is evaluated.
+        
+        The CLI backend only writes the policy file: 'opa eval' compiles
+        modules on every invocation, and prebuilt bundles are recompiled on
+        load as well, so there is no compiled artifact to reuse across
+        processes. Backends that keep OPA state compile the policy here.
+        
+        Args:
+            rego_code: Rego policy code
+            query: OPA query that will be evaluated (uses default if None)
+        """
+        self._policy_file(rego_code)
     
     def check_syntax(self, rego_code: str) -> SyntaxCheckResult:
         """
-        Validate Rego syntax using 'opa check'.
+        Validate Rego syntax using 'opa check', memoized by content hash.
+        
+        Only results of a completed 'opa check' are cached; a check that
+        could not run (timeout, missing binary) is reported but retried
+        on the next call.
         
         Args:
             rego_code: Rego policy code to validate
@@ -492,51 +893,54 @@ class OPARunner:
         Returns:
             Syntax check result
         """
-        temp_file = None
-        try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.rego', delete=False) as f:
-                temp_file = f.name
-                f.write(rego_code)
-            
-            result = subprocess.run(
-                [self.opa_path, "check", temp_file],
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            if result.returncode == 0:
-                return SyntaxCheckResult(valid=True)
-            else:
-                return SyntaxCheckResult(
-                    valid=False,
-                    error_message=result.stderr or result.stdout
-                )
+        digest = _content_hash(rego_code)
+        cached = self._syntax_cache.get(digest)
+        if cached is not None:
+            return cached
         
+        try:
+            result = self._check_syntax(rego_code)
         except Exception as e:
             return SyntaxCheckResult(
                 valid=False,
                 error_message=f"Syntax check failed: {str(e)}"
             )
+        self._syntax_cache[digest] = result
+        return result
+    
+    def _check_syntax(self, rego_code: str) -> SyntaxCheckResult:
+        """Run 'opa check' on rego_code; raises if the check cannot complete."""
+        policy_file = self._policy_file(rego_code)
+        
+        result = subprocess.run(
+            [self.opa_path, "check", policy_file],
+            capture_output=True,
+            timeout=10,
+            env=self._oneshot_env
+        )
         
-        finally:
-            if temp_file and os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except Exception:
-                    pass
+        if result.returncode == 0:
+            return SyntaxCheckResult(valid=True)
+        # Output is only decoded when there is an error to report
+        return SyntaxCheckResult(
+            valid=False,
+            error_message=(result.stderr or result.stdout).decode(errors="replace")
+        )
     
     def evaluate(self, 
                  rego_code: str, 
-                 input_data: Dict[str, Any],
+                 input_data: OPAInput,
                  query: str = None,
                  result_type: RegoResultType = None) -> Decision:
         """
-        Evaluate Rego policy with given input using 'opa eval'.
+        Evaluate Rego policy with given input.
+        
+        Decisions are memoized by (policy hash, query, result type,
+        canonical input); errors are not cached.
         
         Args:
             rego_code: Rego policy code
-            input_data: Input data for evaluation
+            input_data: Input document, or its _canonical_json encoding
             query: OPA query (uses default if None)
             result_type: How to interpret result (uses default if None)
         
@@ -548,33 +952,113 @@ class OPARunner:
         if result_type is None:
             result_type = self.result_type
         
-        temp_policy = None
-        temp_input = None
+        key = self._decision_key(_content_hash(rego_code), query, result_type, input_data)
+        decision = self._decision_cache.get(key)
+        if decision is None:
+            decision = self._evaluate(rego_code, input_data, query, result_type)
+            if decision is not Decision.ERROR:
+                self._decision_cache[key] = decision
+        return decision
+    
+    def evaluate_batch(self,
+                       rego_code: str,
+                       inputs: List[OPAInput],
+                       query: str = None,
+                       result_type: RegoResultType = None) -> List[Decision]:
+        """
+        Evaluate Rego policy for many inputs, only running OPA for uncached ones.
+        
+        Args:
+            rego_code: Rego policy code
+            inputs: Input documents to evaluate, or their _canonical_json
+                    encodings (reused as cache keys and sent to OPA as is)
+            query: OPA query (uses default if None)
+            result_type: How to interpret results (uses default if None)
+        
+        Returns:
+            One Decision per input, in order
+        """
+        if query is None:
+            query = self.default_query
+        if result_type is None:
+            result_type = self.result_type
+        
+        keys, decisions, missing = self._cached_decisions(rego_code, inputs, query, result_type)
+        if missing:
+            evaluated = self._evaluate_batch(rego_code, [inputs[i] for i in missing], query, result_type)
+            self._store_decisions(keys, decisions, missing, evaluated)
+        return decisions
+    
+    async def evaluate_batch_async(self,
+                                   rego_code: str,
+                                   inputs: List[OPAInput],
+                                   query: str = None,
+                                   result_type: RegoResultType = None) -> List[Decision]:
+        """
+        Coroutine version of evaluate_batch.
+        
+        The CLI backend awaits 'opa eval' as an asyncio subprocess, so several
+        batches can be in flight from one thread.
+        """
+        if query is None:
+            query = self.default_query
+        if result_type is None:
+            result_type = self.result_type
         
+        keys, decisions, missing = self._cached_decisions(rego_code, inputs, query, result_type)
+        if missing:
+            evaluated = await self._evaluate_batch_async(
+                rego_code, [inputs[i] for i in missing], query, result_type
+            )
+            self._store_decisions(keys, decisions, missing, evaluated)
+        return decisions
+    
+    def _cached_decisions(self,
+                          rego_code: str,
+                          inputs: List[OPAInput],
+                          query: str,
+                          result_type: RegoResultType) -> Tuple[List[str], List[Optional[Decision]], List[int]]:
+        """Look inputs up in the decision cache; returns keys, decisions and indices of misses."""
+        digest = _content_hash(rego_code)
+        keys = [self._decision_key(digest, query, result_type, input_data) for input_data in inputs]
+        decisions = [self._decision_cache.get(key) for key in keys]
+        missing = [i for i, decision in enumerate(decisions) if decision is None]
+        return keys, decisions, missing
+    
+    def _store_decisions(self, keys: List[str], decisions: List[Optional[Decision]],
+                         missing: List[int], evaluated: List[Decision]):
+        """Fill in evaluated decisions for the missed indices and cache the non-errors."""
+        for i, decision in zip(missing, evaluated):
+            decisions[i] = decision
+            if decision is not Decision.ERROR:
+                self._decision_cache[keys[i]] = decision
+    
+    def _evaluate(self,
+                  rego_code: str,
+                  input_data: OPAInput,
+                  query: str,
+                  result_type: RegoResultType) -> Decision:
+        """Evaluate one input using 'opa eval'."""
         try:
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.rego', delete=False) as f:
-                temp_policy = f.name
-                f.write(rego_code)
-            
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
-                temp_input = f.name
-                json.dump(input_data, f)
+            policy_file = self._policy_file(rego_code)
             
+            # Input is piped through stdin rather than a second temp file
             result = subprocess.run(
                 [self.opa_path, "eval",
-                 "-d", temp_policy,
-                 "-i", temp_input,
+                 "-d", policy_file,
+                 "--stdin-input",
                  "--format", "json",
                  query],
+                input=_input_bytes(input_data),
                 capture_output=True,
-                text=True,
-                timeout=10
+                timeout=10,
+                env=self._oneshot_env
             )
             
             if result.returncode != 0:
                 return Decision.ERROR
             
-            output = json.loads(result.stdout)
+            output = _json_loads(result.stdout)
             
             value = None
             if output.get("result"):
@@ -585,16 +1069,113 @@ class OPARunner:
             return self._interpret_result(value, result_type)
         
         except Exception as e:
-            print(f"Error evaluating Rego: {e}")
+            logger.debug("Error evaluating Rego: %s", e)
             return Decision.ERROR
+    
+    def _evaluate_batch(self,
+                        rego_code: str,
+                        inputs: List[OPAInput],
+                        query: str,
+                        result_type: RegoResultType) -> List[Decision]:
+        """
+        Evaluate many inputs with a single 'opa eval'.
         
-        finally:
-            for temp_file in [temp_policy, temp_input]:
-                if temp_file and os.path.exists(temp_file):
-                    try:
-                        os.remove(temp_file)
-                    except Exception:
-                        pass
+        All inputs are sent through stdin as {"cases": [...]} and the query
+        is evaluated once per case inside a comprehension, so the policy is
+        parsed and compiled once per batch instead of once per input. If the
+        batch as a whole fails (e.g. a runtime error for one input), each
+        input is evaluated separately so errors stay per test case.
+        """
+        if not inputs:
+            return []
+        
+        try:
+            policy_file = self._policy_file(rego_code)
+            result = subprocess.run(
+                [self.opa_path, "eval",
+                 "-d", policy_file,
+                 "--stdin-input",
+                 "--format", "json",
+                 self._batch_query(query)],
+                input=_batch_payload(inputs),
+                capture_output=True,
+                timeout=10 + len(inputs),
+                env=self._oneshot_env
+            )
+            
+            if result.returncode == 0:
+                output = _json_loads(result.stdout)
+                values = output["result"][0]["expressions"][0]["value"]
+                return self._interpret_batch(values, len(inputs), result_type)
+            logger.debug("Batch evaluation failed, evaluating inputs one by one: %s",
+                         result.stderr.decode(errors="replace"))
+        
+        except Exception as e:
+            logger.debug("Batch evaluation failed, evaluating inputs one by one: %s", e)
+        
+        return [self._evaluate(rego_code, input_data, query, result_type) for input_data in inputs]
+    
+    async def _evaluate_batch_async(self,
+                                    rego_code: str,
+                                    inputs: List[OPAInput],
+                                    query: str,
+                                    result_type: RegoResultType) -> List[Decision]:
+        """Like _evaluate_batch, but awaits 'opa eval' instead of blocking on it."""
+        if not inputs:
+            return []
+        
+        try:
+            policy_file = self._policy_file(rego_code)
+            process = await asyncio.create_subprocess_exec(
+                self.opa_path, "eval",
+                "-d", policy_file,
+                "--stdin-input",
+                "--format", "json",
+                self._batch_query(query),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=self._oneshot_env
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(_batch_payload(inputs)),
+                    timeout=10 + len(inputs)
+                )
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise
+            
+            if process.returncode == 0:
+                output = _json_loads(stdout)
+                values = output["result"][0]["expressions"][0]["value"]
+                return self._interpret_batch(values, len(inputs), result_type)
+            logger.debug("Batch evaluation failed, evaluating inputs one by one: %s",
+                         stderr.decode(errors="replace"))
+        
+        except Exception as e:
+            logger.debug("Batch evaluation failed, evaluating inputs one by one: %s", e)
+        
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: [self._evaluate(rego_code, input_data, query, result_type) for input_data in inputs]
+        )
+    
+    @staticmethod
+    def _batch_query(query: str) -> str:
+        """Wrap a query so it is evaluated once per element of input.cases."""
+        # Each case maps to [] when the query is undefined, else [value]
+        return f"{{i: r | some i; c := input.cases[i]; r := [v | v := {query} with input as c]}}"
+    
+    def _interpret_batch(self, values: Dict[str, List[Any]], count: int,
+                         result_type: RegoResultType) -> List[Decision]:
+        """Interpret the object produced by a batch query, in input order."""
+        interpret = _result_interpreter(result_type)
+        return [
+            interpret(values[str(i)][0] if values[str(i)] else None)
+            for i in range(count)
+        ]
     
     def _interpret_result(self, value: Any, result_type: RegoResultType) -> Decision:
         """
@@ -607,164 +1188,859 @@ class OPARunner:
         Returns:
             Decision based on interpretation
         """
-        if result_type == RegoResultType.DENY_SET:
-            if value is None:
-                return Decision.ALLOW
-            
-            if isinstance(value, (list, dict)):
-                return Decision.DENY if len(value) > 0 else Decision.ALLOW
-            
-            print(f"WARNING: DENY_SET mode expects list/dict, got {type(value).__name__}: {value}")
-            return Decision.ERROR
-        
-        elif result_type == RegoResultType.ALLOW_BOOL:
-            # Strict type checking for boolean
-            if not isinstance(value, bool):
-                print(f"ERROR: ALLOW_BOOL mode expects boolean, got {type(value).__name__}: {value}")
-                print(f"  Hint: Your Rego should return 'true' or 'false', not a collection.")
-                print(f"  Example: allow := true if {{ ... }}")
-                return Decision.ERROR
-            
-            return Decision.ALLOW if value is True else Decision.DENY
-        
-        elif result_type == RegoResultType.DENY_BOOL:
-            # Strict type checking for boolean
-            if not isinstance(value, bool):
-                print(f"ERROR: DENY_BOOL mode expects boolean, got {type(value).__name__}: {value}")
-                print(f"  Hint: Your Rego should return 'true' or 'false', not a collection.")
-                print(f"  Example: deny := true if {{ ... }}")
-                return Decision.ERROR
-            
-            return Decision.DENY if value is True else Decision.ALLOW
-        
-        else:
-            raise ValueError(f"Unknown result_type: {result_type}")
+        return _result_interpreter(result_type)(value)
 
 
-class SCPEvaluator:
+class OPAWasmRunner(OPARunner):
     """
-    Evaluates SCP policies to determine their decision.
+    Evaluates Rego in-process through a WASM build of the policy.
     
-    SCP acts as a permission boundary with implicit Deny by default.
-    Explicit Deny has highest priority over Allow.
+    Each distinct (policy, query) pair is compiled once with
+    'opa build -t wasm' and then evaluated through the opa-wasm binding,
+    so test cases cost no subprocess. Syntax checks still use 'opa check'.
+    Queries that are not a plain data reference, and policies that fail to
+    build, are evaluated with the OPA CLI instead.
     """
     
+    def __init__(self, *args, **kwargs):
+        """Initialize the runner. Takes the same arguments as OPARunner."""
+        if OPAPolicy is None:
+            raise RuntimeError("opa-wasm is not installed")
+        super().__init__(*args, **kwargs)
+        # (policy file, entrypoint) -> OPAPolicy, or None if the build failed
+        self._wasm_policies: Dict[Tuple[str, str], Any] = {}
+        # WASM instances are not safe for concurrent calls
+        self._wasm_lock = threading.Lock()
+    
+    def prepare(self, rego_code: str, query: str = None):
+        """Build and load the WASM policy for the query ahead of evaluation."""
+        super().prepare(rego_code, query)
+        entrypoint = self._entrypoint(query or self.default_query)
+        if entrypoint:
+            self._wasm_policy(rego_code, entrypoint)
+    
     @staticmethod
-    def normalize_to_list(value: Any) -> List[str]:
-        """Normalize a value to a list of strings."""
-        if isinstance(value, str):
-            return [value]
-        elif isinstance(value, list):
-            return value
-        return []
+    def _entrypoint(query: str) -> Optional[str]:
+        """Convert a query such as data.aws.scp.deny to a WASM entrypoint (aws/scp/deny)."""
+        if not re.fullmatch(r'data(\.[A-Za-z_][A-Za-z0-9_]*)+', query):
+            return None
+        return query[len('data.'):].replace('.', '/')
     
-    def evaluate(self, scp_json: Dict[str, Any], test_case: TestCase) -> Decision:
-        """
-        Evaluate an SCP policy for a given test case.
-        
-        SCP Evaluation Logic:
-        1. Check for explicit Deny - any match returns Deny immediately
-        2. Check for explicit Allow - any match returns Allow
-        3. No explicit Allow = implicit Deny (SCP as boundary)
+    def _wasm_policy(self, rego_code: str, entrypoint: str) -> Any:
+        """Build and load the WASM policy for rego_code, or return None on failure."""
+        policy_file = self._policy_file(rego_code)
+        key = (policy_file, entrypoint)
+        if key in self._wasm_policies:
+            return self._wasm_policies[key]
+        
+        wasm_policy = None
+        bundle = os.path.splitext(policy_file)[0] + f".{entrypoint.replace('/', '.')}.tar.gz"
+        try:
+            result = subprocess.run(
+                [self.opa_path, "build", "-t", "wasm", "-e", entrypoint, "-o", bundle, policy_file],
+                capture_output=True,
+                timeout=30
+            )
+            if result.returncode != 0:
+                logger.debug("WASM build failed, using the OPA CLI: %s", result.stderr.decode(errors="replace"))
+            else:
+                wasm_file = os.path.splitext(bundle)[0] + ".wasm"
+                with tarfile.open(bundle) as tar:
+                    member = tar.extractfile("/policy.wasm")
+                    with open(wasm_file, 'wb') as f:
+                        f.write(member.read())
+                wasm_policy = OPAPolicy(wasm_file)
+        except Exception as e:
+            logger.debug("Could not load WASM policy, using the OPA CLI: %s", e)
+        
+        self._wasm_policies[key] = wasm_policy
+        return wasm_policy
+    
+    def _evaluate(self,
+                  rego_code: str,
+                  input_data: OPAInput,
+                  query: str,
+                  result_type: RegoResultType) -> Decision:
+        """Evaluate one input in-process, or with the OPA CLI if there is no WASM build."""
+        entrypoint = self._entrypoint(query)
+        wasm_policy = self._wasm_policy(rego_code, entrypoint) if entrypoint else None
+        if wasm_policy is None:
+            return super()._evaluate(rego_code, input_data, query, result_type)
+        
+        try:
+            # An undefined result comes back as an empty result set
+            with self._wasm_lock:
+                results = wasm_policy.evaluate(_input_document(input_data))
+            value = results[0].get("result") if results else None
+            return self._interpret_result(value, result_type)
+        except Exception as e:
+            logger.debug("Error evaluating Rego: %s", e)
+            return Decision.ERROR
+    
+    def _evaluate_batch(self,
+                        rego_code: str,
+                        inputs: List[OPAInput],
+                        query: str,
+                        result_type: RegoResultType) -> List[Decision]:
+        """Evaluate many inputs, in-process when the policy has a WASM build."""
+        entrypoint = self._entrypoint(query)
+        if entrypoint is None or self._wasm_policy(rego_code, entrypoint) is None:
+            return super()._evaluate_batch(rego_code, inputs, query, result_type)
+        return [self._evaluate(rego_code, input_data, query, result_type) for input_data in inputs]
+    
+    async def _evaluate_batch_async(self,
+                                    rego_code: str,
+                                    inputs: List[OPAInput],
+                                    query: str,
+                                    result_type: RegoResultType) -> List[Decision]:
+        """Evaluate in-process when possible, otherwise await the OPA CLI."""
+        entrypoint = self._entrypoint(query)
+        if entrypoint is None or self._wasm_policy(rego_code, entrypoint) is None:
+            return await super()._evaluate_batch_async(rego_code, inputs, query, result_type)
+        return self._evaluate_batch(rego_code, inputs, query, result_type)
+
+
+def _stop_process(process: subprocess.Popen):
+    """Terminate a child process, killing it if it does not exit promptly."""
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+class OPAServerRunner(OPARunner):
+    """
+    Evaluates Rego against a long-lived 'opa run --server' process.
+    
+    The server is started on first use and stopped when the runner is
+    garbage collected or the interpreter exits. The policy under test is
+    uploaded through the Policy API only when it changes. Each query is
+    also uploaded once, as rules of a helper module, and evaluated through
+    the Data API over a keep-alive HTTP connection, so test cases pay
+    neither process start-up nor Rego or query compilation. Policies share one module id because
+    translated policies usually share a package, so only one policy is
+    loaded at a time and requests are serialized per runner;
+    SCPValidator.validate_all_policies therefore validates one policy at a
+    time with this backend. Syntax checks still use 'opa check'.
+    """
+    
+    _POLICY_ID = "scp_validation"
+    _QUERY_PACKAGE = "scp_validation_queries"
+    
+    def __init__(self, *args, **kwargs):
+        """Initialize the runner. Takes the same arguments as OPARunner."""
+        super().__init__(*args, **kwargs)
+        self._server: Optional[subprocess.Popen] = None
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._loaded_policy: Optional[str] = None
+        # query -> Data API path of its helper module
+        self._query_paths: Dict[str, str] = {}
+        self._server_lock = threading.Lock()
+    
+    def _start_server(self):
+        """Start the OPA server on a free local port and wait until it is healthy."""
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        
+        self._server = subprocess.Popen(
+            [self.opa_path, "run", "--server", f"--addr=127.0.0.1:{port}", "--log-level=error"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        weakref.finalize(self, _stop_process, self._server)
+        self._connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        
+        deadline = time.monotonic() + 10
+        while True:
+            try:
+                if self._request("GET", "/health")[0] == 200:
+                    return
+            except OSError:
+                pass
+            if self._server.poll() is not None or time.monotonic() > deadline:
+                _stop_process(self._server)
+                self._server = None
+                raise RuntimeError(f"OPA server failed to start from {self.opa_path}")
+            time.sleep(0.05)
+    
+    def _request(self, method: str, path: str, body: bytes = None) -> Tuple[int, Any]:
+        """Send one request on the keep-alive connection, reconnecting once if it dropped."""
+        for attempt in range(2):
+            try:
+                self._connection.request(method, path, body=body)
+                response = self._connection.getresponse()
+                data = response.read()
+                return response.status, (_json_loads(data) if data else None)
+            except (http.client.HTTPException, ConnectionError):
+                self._connection.close()
+                if attempt:
+                    raise
+    
+    def _load_policy(self, rego_code: str):
+        """
+        Start the server if needed and upload rego_code unless it is already loaded.
+        
+        Must be called with _server_lock held.
+        
+        Raises:
+            RuntimeError: If the server cannot start or rejects the policy
+        """
+        if self._server is None:
+            self._start_server()
+        
+        digest = _content_hash(rego_code)
+        if self._loaded_policy != digest:
+            status, body = self._request("PUT", f"/v1/policies/{self._POLICY_ID}", rego_code.encode())
+            if status != 200:
+                raise RuntimeError(f"OPA rejected policy: {body}")
+            self._loaded_policy = digest
+    
+    def _query_path(self, query: str) -> str:
+        """
+        Upload a helper module evaluating query, once per query per server.
+        
+        The module defines 'single' (the query) and 'batch' (the query over
+        input.cases), so evaluations are plain Data API reads of rules the
+        server has already compiled. Must be called with _server_lock held.
+        
+        Raises:
+            RuntimeError: If the server rejects the query
+        """
+        path = self._query_paths.get(query)
+        if path is None:
+            name = f"q{_content_hash(query)[:16]}"
+            module = (
+                f"package {self._QUERY_PACKAGE}.{name}\n\n"
+                f"single := {query}\n\n"
+                f"batch := {self._batch_query(query)}\n"
+            )
+            status, body = self._request("PUT", f"/v1/policies/{self._QUERY_PACKAGE}_{name}", module.encode())
+            if status != 200:
+                raise RuntimeError(f"OPA rejected query: {body}")
+            path = self._query_paths[query] = f"{self._QUERY_PACKAGE}/{name}"
+        return path
+    
+    def prepare(self, rego_code: str, query: str = None):
+        """Start the server and upload (compile) the policy ahead of evaluation."""
+        try:
+            with self._server_lock:
+                self._load_policy(rego_code)
+        except Exception as e:
+            # Evaluations will report the failure per test case
+            logger.debug("Could not prepare policy on the OPA server: %s", e)
+    
+    def _server_query(self, rego_code: str, query: str, rule: str, input_data: OPAInput) -> Any:
+        """
+        Evaluate the 'single' or 'batch' rule for query against rego_code on the server.
+        
+        Returns:
+            The rule value; None when it is undefined
+        
+        Raises:
+            RuntimeError: If the policy cannot be loaded or the query fails
+        """
+        with self._server_lock:
+            self._load_policy(rego_code)
+            path = self._query_path(query)
+            
+            status, body = self._request("POST", f"/v1/data/{path}/{rule}",
+                                         b'{"input":' + _input_bytes(input_data) + b'}')
+            if status != 200:
+                raise RuntimeError(f"OPA query failed: {body}")
+            return (body or {}).get("result")
+    
+    def _evaluate(self,
+                  rego_code: str,
+                  input_data: OPAInput,
+                  query: str,
+                  result_type: RegoResultType) -> Decision:
+        """Evaluate one input on the OPA server."""
+        try:
+            value = self._server_query(rego_code, query, "single", input_data)
+            return self._interpret_result(value, result_type)
+        except Exception as e:
+            logger.debug("Error evaluating Rego: %s", e)
+            return Decision.ERROR
+    
+    def _evaluate_batch(self,
+                        rego_code: str,
+                        inputs: List[OPAInput],
+                        query: str,
+                        result_type: RegoResultType) -> List[Decision]:
+        """Evaluate many inputs with one server query, falling back to one query per input."""
+        if not inputs:
+            return []
+        
+        try:
+            values = self._server_query(rego_code, query, "batch", _batch_payload(inputs))
+            return self._interpret_batch(values, len(inputs), result_type)
+        except Exception as e:
+            logger.debug("Batch evaluation failed, evaluating inputs one by one: %s", e)
+        
+        return [self._evaluate(rego_code, input_data, query, result_type) for input_data in inputs]
+    
+    async def _evaluate_batch_async(self,
+                                    rego_code: str,
+                                    inputs: List[OPAInput],
+                                    query: str,
+                                    result_type: RegoResultType) -> List[Decision]:
+        """Server queries are serialized and sub-millisecond, so this runs synchronously."""
+        return self._evaluate_batch(rego_code, inputs, query, result_type)
+    
+    def close(self):
+        """Stop the OPA server, if it was started."""
+        with self._server_lock:
+            if self._server is not None:
+                self._connection.close()
+                _stop_process(self._server)
+                self._server = None
+                self._loaded_policy = None
+                self._query_paths.clear()
+
+def create_opa_runner(opa_path: str = "opa",
+                      default_query: str = "data.aws.scp.deny",
+                      result_type: RegoResultType = RegoResultType.DENY_SET,
+                      backend: str = "cli",
+                      cache_dir: Optional[str] = None) -> OPARunner:
+    """
+    Create an OPA runner for the requested backend.
+    
+    Args:
+        opa_path: Path to OPA executable
+        default_query: Default OPA query to execute
+        result_type: How to interpret Rego results
+        backend: "cli" (one 'opa eval' per batch of tests), "server" (a
+                 persistent 'opa run --server') or "wasm" (in-process, falls
+                 back to "cli" when opa-wasm is not installed)
+        cache_dir: Directory to persist syntax checks and decisions in
+    
+    Returns:
+        OPARunner instance
+    """
+    if backend == "wasm":
+        if OPAPolicy is not None:
+            return OPAWasmRunner(opa_path, default_query, result_type, cache_dir)
+        logger.debug("opa-wasm is not installed, using the OPA CLI backend")
+    elif backend == "server":
+        return OPAServerRunner(opa_path, default_query, result_type, cache_dir)
+    elif backend != "cli":
+        raise ValueError(f"Unknown OPA backend: {backend}")
+    return OPARunner(opa_path, default_query, result_type, cache_dir)
+
+
+def _prepare_string_set(condition_values: List[Any]) -> Any:
+    """Prepare StringEquals/StringNotEquals values for membership tests."""
+    try:
+        return frozenset(condition_values)
+    except TypeError:
+        return tuple(condition_values)
+
+
+def _prepare_string_patterns(condition_values: List[Any]) -> Tuple[Callable[[str], bool], ...]:
+    """Prepare StringLike/StringNotLike values as wildcard predicates."""
+    return tuple(_wildcard_matcher(str(cv)) for cv in condition_values)
+
+
+def _prepare_numbers(condition_values: List[Any]) -> Optional[Tuple[float, ...]]:
+    """Prepare Numeric* values as floats, or None if any value is not numeric."""
+    try:
+        return tuple(float(cv) for cv in condition_values)
+    except (ValueError, TypeError):
+        return None
+
+
+def _prepare_number_set(condition_values: List[Any]) -> Optional[FrozenSet[float]]:
+    """Prepare NumericEquals values as a float set, or None if any value is not numeric."""
+    numbers = _prepare_numbers(condition_values)
+    return frozenset(numbers) if numbers is not None else None
+
+
+def _prepare_min(condition_values: List[Any]) -> Optional[float]:
+    """Prepare NumericLessThan values as their minimum, or None if empty or not numeric."""
+    numbers = _prepare_numbers(condition_values)
+    return min(numbers) if numbers else None
+
+
+def _prepare_max(condition_values: List[Any]) -> Optional[float]:
+    """Prepare NumericGreaterThan values as their maximum, or None if empty or not numeric."""
+    numbers = _prepare_numbers(condition_values)
+    return max(numbers) if numbers else None
+
+
+def _prepare_bool(condition_values: List[Any]) -> Optional[bool]:
+    """Prepare Bool values as the expected boolean, or None if empty."""
+    if not condition_values:
+        return None
+    return str(condition_values[0]).lower() == "true"
+
+
+def _context_number(context_value: Any) -> Optional[float]:
+    """Convert a context value to float (None stays None); raises on bad input."""
+    return float(context_value) if context_value is not None else None
+
+
+def _cond_string_equals(context_value: Any, values: Any) -> bool:
+    """StringEquals: context value is one of the values."""
+    try:
+        return context_value in values
+    except TypeError:
+        return False
+
+
+def _cond_string_not_equals(context_value: Any, values: Any) -> bool:
+    """StringNotEquals: context value is none of the values."""
+    return not _cond_string_equals(context_value, values)
+
+
+def _cond_string_like(context_value: Any, patterns: Tuple[Callable[[str], bool], ...]) -> bool:
+    """StringLike: context value matches any wildcard pattern."""
+    value = str(context_value)
+    return any(matches(value) for matches in patterns)
+
+
+def _cond_string_not_like(context_value: Any, patterns: Tuple[Callable[[str], bool], ...]) -> bool:
+    """StringNotLike: context value matches no wildcard pattern."""
+    return not _cond_string_like(context_value, patterns)
+
+
+def _cond_numeric_equals(context_value: Any, numbers: Optional[FrozenSet[float]]) -> bool:
+    """NumericEquals: context number is one of the values."""
+    if numbers is None:
+        return False
+    try:
+        return _context_number(context_value) in numbers
+    except (ValueError, TypeError):
+        return False
+
+
+def _cond_numeric_less_than(context_value: Any, lowest: Optional[float]) -> bool:
+    """NumericLessThan: context number is below every value."""
+    if lowest is None:
+        return False
+    try:
+        ctx_num = _context_number(context_value)
+    except (ValueError, TypeError):
+        return False
+    return ctx_num is not None and ctx_num < lowest
+
+
+def _cond_numeric_greater_than(context_value: Any, highest: Optional[float]) -> bool:
+    """NumericGreaterThan: context number is above every value."""
+    if highest is None:
+        return False
+    try:
+        ctx_num = _context_number(context_value)
+    except (ValueError, TypeError):
+        return False
+    return ctx_num is not None and ctx_num > highest
+
+
+def _cond_numeric_other(context_value: Any, numbers: Optional[Tuple[float, ...]]) -> bool:
+    """Other Numeric* operators: only require that all values parse."""
+    if numbers is None:
+        return False
+    try:
+        _context_number(context_value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def _cond_bool(context_value: Any, expected: Optional[bool]) -> bool:
+    """Bool: context value is the expected boolean."""
+    if expected is None:
+        return False
+    return (str(context_value).lower() == "true") == expected
+
+
+# condition_type -> (prepare condition values once, check a context value)
+_COND_HANDLERS: Dict[str, Tuple[Callable[[List[Any]], Any], Callable[[Any, Any], bool]]] = {
+    "StringEquals": (_prepare_string_set, _cond_string_equals),
+    "StringNotEquals": (_prepare_string_set, _cond_string_not_equals),
+    "StringLike": (_prepare_string_patterns, _cond_string_like),
+    "StringNotLike": (_prepare_string_patterns, _cond_string_not_like),
+    "NumericEquals": (_prepare_number_set, _cond_numeric_equals),
+    "NumericLessThan": (_prepare_min, _cond_numeric_less_than),
+    "NumericGreaterThan": (_prepare_max, _cond_numeric_greater_than),
+    "Bool": (_prepare_bool, _cond_bool),
+}
+_NUMERIC_FALLBACK = (_prepare_numbers, _cond_numeric_other)
+
+# Relative cost of each check; set lookups run first, wildcard matching last
+_CHECK_COST: Dict[Callable[[Any, Any], bool], int] = {
+    _cond_string_equals: 0,
+    _cond_string_not_equals: 0,
+    _cond_bool: 0,
+    _cond_string_like: 2,
+    _cond_string_not_like: 2,
+}
+
+# Compiled condition block: [(condition_key, check, prepared_values), ...]
+ConditionProgram = List[Tuple[str, Callable[[Any, Any], bool], Any]]
+
+
+def _compile_condition_block(conditions: Dict[str, Any]) -> ConditionProgram:
+    """
+    Compile a condition block into a list of (key, check, prepared values).
+    
+    Unsupported condition types are skipped, matching the evaluator's
+    behavior of ignoring operators it does not model. All conditions must
+    hold, so the program is ordered cheapest check first to fail fast.
+    
+    Args:
+        conditions: Condition block from SCP statement
+    
+    Returns:
+        Compiled condition program
+    """
+    compiled = []
+    for condition_type, condition_block in conditions.items():
+        handlers = _COND_HANDLERS.get(condition_type)
+        if handlers is None:
+            if not condition_type.startswith("Numeric"):
+                continue
+            handlers = _NUMERIC_FALLBACK
+        prepare, check = handlers
+        
+        for condition_key, condition_values in condition_block.items():
+            # Normalize condition values to list
+            if not isinstance(condition_values, list):
+                condition_values = [condition_values]
+            compiled.append((condition_key, check, prepare(condition_values)))
+    
+    compiled.sort(key=lambda condition: _CHECK_COST.get(condition[1], 1))
+    return compiled
+
+
+@dataclass
+class CompiledPolicy:
+    """
+    SCP policy preprocessed once for repeated evaluation.
+    
+    Statements are stored as parallel arrays indexed by statement position.
+    Effects are stored as integer codes so the evaluation loop compares
+    ints instead of Enum members. A pattern list of None means the
+    statement does not use that field. Each pattern list also has a
+    matching *_regexes entry: one alternation regex covering every pattern,
+    so a field is checked with a single fullmatch.
+    Invalid statements (both Action and NotAction, or both Resource and
+    NotResource) are reported once at compile time and left out, since
+    they can never match.
+    Statements are also indexed lazily by action service prefix (the part
+    before ':'), so an action is only checked against the Deny and Allow
+    statements that can name its service.
+    """
+    effects: List[Optional[int]] = field(default_factory=list)
+    action_patterns: List[Optional[List[str]]] = field(default_factory=list)
+    not_action_patterns: List[Optional[List[str]]] = field(default_factory=list)
+    resource_patterns: List[Optional[List[str]]] = field(default_factory=list)
+    not_resource_patterns: List[Optional[List[str]]] = field(default_factory=list)
+    action_regexes: List[Optional[re.Pattern]] = field(default_factory=list)
+    not_action_regexes: List[Optional[re.Pattern]] = field(default_factory=list)
+    resource_regexes: List[Optional[re.Pattern]] = field(default_factory=list)
+    not_resource_regexes: List[Optional[re.Pattern]] = field(default_factory=list)
+    condition_programs: List[ConditionProgram] = field(default_factory=list)
+    # service prefix -> (Deny statement indices, Allow statement indices)
+    service_index: Dict[str, Tuple[List[int], List[int]]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+    
+    @classmethod
+    def compile(cls, scp_json: Dict[str, Any]) -> "CompiledPolicy":
+        """
+        Compile an SCP policy document.
         
         Args:
             scp_json: SCP policy document
-            test_case: Test case to evaluate
         
         Returns:
-            Decision (ALLOW or DENY)
+            CompiledPolicy ready for SCPEvaluator.evaluate
         """
+        policy = cls()
+        
         statements = scp_json.get('Statement', [])
         if not isinstance(statements, list):
             statements = [statements]
         
-        # Pass 1: Check for explicit Deny (highest priority)
         for statement in statements:
             try:
-                if self._statement_matches(statement, test_case):
-                    effect = statement.get('Effect', 'Deny')
-                    if effect == 'Deny':
-                        return Decision.DENY
+                policy._add_statement(statement)
             except ValueError as e:
-                print(f"ERROR: Invalid statement in policy: {e}")
-                print(f"  Statement: {json.dumps(statement, indent=2)}")
-                continue
+                logger.debug("Invalid statement in policy: %s", e)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("  Statement: %s", json.dumps(statement, indent=2))
+        
+        return policy
+    
+    def _add_statement(self, statement: Dict[str, Any]):
+        """
+        Append one statement to the parallel arrays.
+        
+        Raises:
+            ValueError: If statement has both Action and NotAction, 
+                       or both Resource and NotResource
+        """
+        if not isinstance(statement, dict):
+            raise ValueError("Statement must be an object")
+        if 'Action' in statement and 'NotAction' in statement:
+            raise ValueError("Statement cannot have both Action and NotAction")
+        if 'Resource' in statement and 'NotResource' in statement:
+            raise ValueError("Statement cannot have both Resource and NotResource")
+        
+        def add_field(key: str, pattern_list: List, regex_list: List):
+            patterns = _normalize_to_list(statement[key]) if key in statement else None
+            pattern_list.append(patterns)
+            regex_list.append(_union_regex(patterns) if patterns is not None else None)
+        
+        # Missing Effect is treated as Deny; unknown effects (None) never decide
+        self.effects.append(_EFFECT_CODES.get(statement.get('Effect', 'Deny')))
+        add_field('Action', self.action_patterns, self.action_regexes)
+        add_field('NotAction', self.not_action_patterns, self.not_action_regexes)
+        add_field('Resource', self.resource_patterns, self.resource_regexes)
+        add_field('NotResource', self.not_resource_patterns, self.not_resource_regexes)
+        self.condition_programs.append(_compile_condition_block(statement.get('Condition') or {}))
+        self.service_index.clear()
+    
+    def statements_for(self, action: str) -> Tuple[List[int], List[int]]:
+        """
+        Get the Deny and Allow statements that can match an action's service.
+        
+        Args:
+            action: Action being evaluated, e.g. 's3:GetObject'
+        
+        Returns:
+            Tuple of (Deny statement indices, Allow statement indices)
+        """
+        service = action.partition(':')[0]
+        candidates = self.service_index.get(service)
+        if candidates is None:
+            deny, allow = [], []
+            for idx, effect in enumerate(self.effects):
+                if effect is None:
+                    continue
+                patterns = self.action_patterns[idx]
+                if patterns is not None and not any(_may_match_service(p, service) for p in patterns):
+                    continue
+                (deny if effect == _EFFECT_DENY else allow).append(idx)
+            candidates = self.service_index[service] = (deny, allow)
+        return candidates
+
+
+@lru_cache(maxsize=256)
+def _compile_policy(canonical_scp: bytes) -> CompiledPolicy:
+    """Compile an SCP document given as canonical JSON, memoized by content."""
+    return CompiledPolicy.compile(_json_loads(canonical_scp))
+
+
+def _may_match_service(pattern: str, service: str) -> bool:
+    """Check whether an Action pattern can match some action of the given service."""
+    prefix, sep, _ = pattern.partition(':')
+    if not sep or '*' in prefix or '?' in prefix:
+        return True
+    return prefix == service
+
+
+class SCPEvaluator:
+    """
+    Evaluates SCP policies to determine their decision.
+    
+    SCP acts as a permission boundary with implicit Deny by default.
+    Explicit Deny has highest priority over Allow.
+    """
+    
+    def __init__(self):
+        """Initialize the evaluator with an empty condition cache."""
+        # id(conditions) -> (conditions, ConditionProgram)
+        self._compiled_conditions: Dict[int, Tuple[Dict[str, Any], ConditionProgram]] = {}
+    
+    @staticmethod
+    def normalize_to_list(value: Any) -> List[str]:
+        """Normalize a value to a list of strings."""
+        return _normalize_to_list(value)
+    
+    def compile(self, scp_json: Dict[str, Any]) -> CompiledPolicy:
+        """
+        Compile an SCP policy, reusing the result for identical content.
+        
+        Callers that evaluate many test cases against one policy should
+        compile it once and pass the CompiledPolicy to evaluate(). The
+        cache is keyed by the document's canonical JSON, so documents with
+        identical content share one CompiledPolicy across evaluators and a
+        mutated document is compiled afresh.
+        
+        Args:
+            scp_json: SCP policy document
+        
+        Returns:
+            CompiledPolicy for the document
+        """
+        return _compile_policy(_canonical_json(scp_json))
+    
+    def evaluate(self, scp_json: Union[Dict[str, Any], CompiledPolicy], test_case: TestCase) -> Decision:
+        """
+        Evaluate an SCP policy for a given test case.
+        
+        SCP Evaluation Logic:
+        1. Check for explicit Deny - any match returns Deny immediately
+        2. Check for explicit Allow - any match returns Allow
+        3. No explicit Allow = implicit Deny (SCP as boundary)
+        
+        Args:
+            scp_json: SCP policy document or a CompiledPolicy
+            test_case: Test case to evaluate
+        
+        Returns:
+            Decision (ALLOW or DENY)
+        """
+        policy = scp_json if isinstance(scp_json, CompiledPolicy) else self.compile(scp_json)
+        deny_statements, allow_statements = policy.statements_for(test_case.action)
+        
+        # Pass 1: Check for explicit Deny (highest priority)
+        for idx in deny_statements:
+            if self._statement_matches(policy, idx, test_case):
+                return Decision.DENY
         
         # Pass 2: Check for explicit Allow
         has_explicit_allow = False
-        for statement in statements:
-            try:
-                if self._statement_matches(statement, test_case):
-                    effect = statement.get('Effect')
-                    if effect == 'Allow':
-                        has_explicit_allow = True
-                        break
-            except ValueError as e:
-                continue
+        for idx in allow_statements:
+            if self._statement_matches(policy, idx, test_case):
+                has_explicit_allow = True
+                break
         
         return Decision.ALLOW if has_explicit_allow else Decision.DENY
     
-    def _statement_matches(self, statement: Dict[str, Any], test_case: TestCase) -> bool:
+    def evaluate_batch(self,
+                       scp_json: Union[Dict[str, Any], CompiledPolicy],
+                       test_cases: List[TestCase]) -> List[Decision]:
         """
-        Check if a statement matches the test case.
+        Evaluate an SCP policy for many test cases in one pass.
+        
+        Test cases are grouped by action service, and each candidate
+        statement is applied column-wise to the cases still undecided, one
+        field at a time. Decisions are identical to calling evaluate() per
+        test case.
         
         Args:
-            statement: SCP statement
-            test_case: Test case to match against
+            scp_json: SCP policy document or a CompiledPolicy
+            test_cases: Test cases to evaluate
         
         Returns:
-            True if statement matches
-        
-        Raises:
-            ValueError: If statement has both Action and NotAction, 
-                       or both Resource and NotResource
+            One Decision per test case, in order
         """
-        # Action/NotAction validation and matching
-        has_action = 'Action' in statement
-        has_not_action = 'NotAction' in statement
+        policy = scp_json if isinstance(scp_json, CompiledPolicy) else self.compile(scp_json)
+        decisions = [Decision.DENY] * len(test_cases)
         
-        if has_action and has_not_action:
-            raise ValueError("Statement cannot have both Action and NotAction")
+        groups: Dict[str, List[int]] = {}
+        for i, test_case in enumerate(test_cases):
+            groups.setdefault(test_case.action.partition(':')[0], []).append(i)
         
-        if has_action:
-            actions = self.normalize_to_list(statement['Action'])
-            action_matches = any(
-                self._matches_pattern(test_case.action, action)
-                for action in actions
-            )
-            if not action_matches:
-                return False
+        for members in groups.values():
+            deny_statements, allow_statements = policy.statements_for(test_cases[members[0]].action)
+            
+            # Pass 1: explicit Deny removes cases; they stay DENY
+            undecided = members
+            for idx in deny_statements:
+                if not undecided:
+                    break
+                matched = set(self._matching_cases(policy, idx, test_cases, undecided))
+                if matched:
+                    undecided = [i for i in undecided if i not in matched]
+            
+            # Pass 2: explicit Allow; anything left is an implicit Deny
+            for idx in allow_statements:
+                if not undecided:
+                    break
+                matched = set(self._matching_cases(policy, idx, test_cases, undecided))
+                if matched:
+                    for i in matched:
+                        decisions[i] = Decision.ALLOW
+                    undecided = [i for i in undecided if i not in matched]
         
-        elif has_not_action:
-            not_actions = self.normalize_to_list(statement['NotAction'])
-            if any(self._matches_pattern(test_case.action, action) for action in not_actions):
-                return False
+        return decisions
+    
+    @staticmethod
+    def _matching_cases(policy: CompiledPolicy,
+                        idx: int,
+                        test_cases: List[TestCase],
+                        candidates: List[int]) -> List[int]:
+        """Filter candidate test case indices down to those matching statement idx."""
+        actions = policy.action_regexes[idx]
+        if actions is not None:
+            candidates = [i for i in candidates if actions.fullmatch(test_cases[i].action) is not None]
+        else:
+            not_actions = policy.not_action_regexes[idx]
+            if not_actions is not None:
+                candidates = [i for i in candidates if not_actions.fullmatch(test_cases[i].action) is None]
         
-        # Resource/NotResource validation and matching
-        has_resource = 'Resource' in statement
-        has_not_resource = 'NotResource' in statement
+        resources = policy.resource_regexes[idx]
+        if resources is not None:
+            candidates = [i for i in candidates if resources.fullmatch(test_cases[i].resource) is not None]
+        else:
+            not_resources = policy.not_resource_regexes[idx]
+            if not_resources is not None:
+                candidates = [i for i in candidates if not_resources.fullmatch(test_cases[i].resource) is None]
+        
+        for condition_key, check, values in policy.condition_programs[idx]:
+            if not candidates:
+                break
+            # Cases in a batch share few distinct values per key, so each
+            # distinct value is checked once
+            outcomes: Dict[Tuple[type, Any], bool] = {}
+            kept = []
+            for i in candidates:
+                value = test_cases[i].context.get(condition_key)
+                try:
+                    key = (type(value), value)
+                    matched = outcomes.get(key)
+                    if matched is None:
+                        matched = outcomes[key] = check(value, values)
+                except TypeError:  # unhashable value, e.g. a list
+                    matched = check(value, values)
+                if matched:
+                    kept.append(i)
+            candidates = kept
+        
+        return candidates
+    
+    def _statement_matches(self, policy: CompiledPolicy, idx: int, test_case: TestCase) -> bool:
+        """
+        Check if a compiled statement matches the test case.
         
-        if has_resource and has_not_resource:
-            raise ValueError("Statement cannot have both Resource and NotResource")
+        Args:
+            policy: Compiled SCP policy
+            idx: Statement index within the policy
+            test_case: Test case to match against
         
-        if has_resource:
-            resources = self.normalize_to_list(statement['Resource'])
-            resource_matches = any(
-                self._matches_pattern(test_case.resource, resource)
-                for resource in resources
-            )
-            if not resource_matches:
+        Returns:
+            True if statement matches
+        """
+        # Action/NotAction matching
+        actions = policy.action_regexes[idx]
+        if actions is not None:
+            if actions.fullmatch(test_case.action) is None:
+                return False
+        else:
+            not_actions = policy.not_action_regexes[idx]
+            if not_actions is not None and not_actions.fullmatch(test_case.action) is not None:
                 return False
         
-        elif has_not_resource:
-            not_resources = self.normalize_to_list(statement['NotResource'])
-            if any(self._matches_pattern(test_case.resource, resource) for resource in not_resources):
+        # Resource/NotResource matching
+        resources = policy.resource_regexes[idx]
+        if resources is not None:
+            if resources.fullmatch(test_case.resource) is None:
+                return False
+        else:
+            not_resources = policy.not_resource_regexes[idx]
+            if not_resources is not None and not_resources.fullmatch(test_case.resource) is not None:
                 return False
         
         # Condition evaluation
-        conditions = statement.get('Condition', {})
-        if conditions:
-            if not self._evaluate_conditions(conditions, test_case.context):
+        context = test_case.context
+        for condition_key, check, values in policy.condition_programs[idx]:
+            if not check(context.get(condition_key), values):
                 return False
         
         return True
@@ -782,11 +2058,29 @@ class SCPEvaluator:
         Returns:
             True if value matches pattern
         """
-        if pattern == '*':
-            return True
+        return _matches_wildcard(value, pattern)
+    
+    def _compile_conditions(self, conditions: Dict[str, Any]) -> ConditionProgram:
+        """
+        Compile a condition block, memoized by identity.
+        
+        Condition values are normalized and prepared once per condition block
+        (frozensets, floats, compiled patterns), so repeated test cases only
+        pay for a dict lookup and a handler call.
+        
+        Args:
+            conditions: Condition block from SCP statement
+        
+        Returns:
+            Compiled condition program
+        """
+        cached = self._compiled_conditions.get(id(conditions))
+        if cached is not None and cached[0] is conditions:
+            return cached[1]
         
-        regex_pattern = re.escape(pattern).replace(r'\*', r'.*')
-        return re.match(f'^{regex_pattern}$', value) is not None
+        compiled = _compile_condition_block(conditions)
+        self._compiled_conditions[id(conditions)] = (conditions, compiled)
+        return compiled
     
     def _evaluate_conditions(self, conditions: Dict[str, Any], context: Dict[str, Any]) -> bool:
         """
@@ -799,57 +2093,49 @@ class SCPEvaluator:
         Returns:
             True if all conditions are satisfied
         """
-        for condition_type, condition_block in conditions.items():
-            for condition_key, condition_values in condition_block.items():
-                context_value = context.get(condition_key)
-                
-                # Normalize condition values to list
-                if not isinstance(condition_values, list):
-                    condition_values = [condition_values]
-                
-                # Evaluate based on condition type
-                if condition_type == "StringEquals":
-                    if context_value not in condition_values:
-                        return False
-                
-                elif condition_type == "StringNotEquals":
-                    if context_value in condition_values:
-                        return False
-                
-                elif condition_type == "StringLike":
-                    if not any(self._matches_pattern(str(context_value), str(cv)) for cv in condition_values):
-                        return False
-                
-                elif condition_type == "StringNotLike":
-                    if any(self._matches_pattern(str(context_value), str(cv)) for cv in condition_values):
-                        return False
-                
-                elif condition_type.startswith("Numeric"):
-                    try:
-                        ctx_num = float(context_value) if context_value is not None else None
-                        cond_nums = [float(cv) for cv in condition_values]
-                        
-                        if condition_type == "NumericEquals":
-                            if ctx_num not in cond_nums:
-                                return False
-                        elif condition_type == "NumericLessThan":
-                            if not (ctx_num is not None and ctx_num < min(cond_nums)):
-                                return False
-                        elif condition_type == "NumericGreaterThan":
-                            if not (ctx_num is not None and ctx_num > max(cond_nums)):
-                                return False
-                    except (ValueError, TypeError):
-                        return False
-                
-                elif condition_type == "Bool":
-                    bool_value = str(context_value).lower() == "true"
-                    expected = str(condition_values[0]).lower() == "true"
-                    if bool_value != expected:
-                        return False
+        for condition_key, check, values in self._compile_conditions(conditions):
+            if not check(context.get(condition_key), values):
+                return False
         
         return True
 
 
+@lru_cache(maxsize=256)
+def _read_bytes(path: str, mtime_ns: int, size: int) -> bytes:
+    """Read a file's bytes, memoized by path and modification stamp."""
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=256)
+def _read_text(path: str, mtime_ns: int, size: int) -> str:
+    """Read a file's text, memoized by path and modification stamp."""
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def _load_file(path: Path, text: bool = False) -> Union[bytes, str]:
+    """Read a file through the mtime-keyed cache, so unchanged files are read once."""
+    stat = path.stat()
+    reader = _read_text if text else _read_bytes
+    return reader(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1)
+def _validator_sha() -> Optional[str]:
+    """
+    Hash of this module's source, recorded in policy fingerprints.
+    
+    Test-case generation and SCP evaluation live here, so any change to
+    them invalidates reports of policies that passed under the old code.
+    None if the source cannot be read (e.g. a bytecode-only install).
+    """
+    try:
+        return hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
 class SCPValidator:
     """Main validator class for SCP to Rego validation."""
     
@@ -858,7 +2144,11 @@ class SCPValidator:
                  rego_dir: str = "src/policies/aws/scp",
                  opa_path: str = "opa",
                  rego_query: str = "data.aws.scp.deny",
-                 rego_result_type: RegoResultType = RegoResultType.DENY_SET):
+                 rego_result_type: RegoResultType = RegoResultType.DENY_SET,
+                 opa_backend: str = "cli",
+                 cache_dir: Optional[str] = None,
+                 fast_fail: bool = False,
+                 max_concurrency: Optional[int] = None):
         """
         Initialize the validator.
         
@@ -868,12 +2158,140 @@ class SCPValidator:
             opa_path: Path to OPA executable
             rego_query: OPA query to execute
             rego_result_type: How to interpret Rego results
+            opa_backend: How Rego is evaluated, see create_opa_runner
+            cache_dir: Directory to persist OPA results across runs (memory only if None)
+            fast_fail: Stop at the first mismatch or syntax failure instead of
+                       running every test of every policy
+            max_concurrency: Number of test-case batches of one policy evaluated
+                             at once (defaults to the CPU count, shared between
+                             the policies validated in parallel)
+        
+        With a cache_dir, validate_all_policies also remembers which policies
+        passed, so unchanged ones are skipped on later runs.
         """
         self.scp_dir = Path(scp_dir)
+        self.fast_fail = fast_fail
+        self.max_concurrency = max_concurrency
         self.rego_dir = Path(rego_dir)
-        self.opa_runner = OPARunner(opa_path, rego_query, rego_result_type)
+        self.opa_runner = create_opa_runner(
+            opa_path, rego_query, rego_result_type, opa_backend, cache_dir
+        )
+        self.cache_dir = cache_dir
+        # policy name -> fingerprint of the files of its last passing run
+        self._passed_policies: Dict[str, Dict[str, Any]] = self._load_results() if cache_dir else {}
         self.scp_evaluator = SCPEvaluator()
         self.test_generator = TestCaseGenerator()
+        # Per-thread progress buffer and batch concurrency used while
+        # validating in parallel
+        self._local = threading.local()
+    
+    def _results_file(self) -> str:
+        """Path of the persisted passing-policy record inside cache_dir."""
+        return os.path.join(self.cache_dir, "results.json")
+    
+    def _load_results(self) -> Dict[str, Dict[str, Any]]:
+        """Load passing-policy fingerprints, ignoring a missing, corrupt or stale file."""
+        try:
+            with open(self._results_file(), 'rb') as f:
+                data = _json_loads(f.read())
+            if data.get("opa_version", "") != self.opa_runner.opa_version:
+                return {}
+            return dict(data.get("policies", {}))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.debug("Ignoring unreadable results cache %s: %s", self._results_file(), e)
+            return {}
+    
+    def save_results(self):
+        """Persist passing-policy fingerprints to cache_dir, if one is configured."""
+        if not self.cache_dir:
+            return
+        
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = {"opa_version": self.opa_runner.opa_version, "policies": self._passed_policies}
+        temp_path = self._results_file() + ".tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(_json_dumps(data))
+        os.replace(temp_path, self._results_file())
+    
+    def _policy_fingerprint(self, policy_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Hash a policy's SCP and Rego files together with the Rego query
+        settings and the validator code that generated and evaluated its tests.
+        
+        Returns:
+            Fingerprint dict, or None if either file (or the validator
+            source) cannot be read
+        """
+        validator_sha = _validator_sha()
+        if validator_sha is None:
+            return None
+        try:
+            scp_sha = hashlib.sha256(_load_file(self.scp_dir / f"{policy_name}.json")).hexdigest()
+            rego_sha = hashlib.sha256(_load_file(self.rego_dir / f"{policy_name}.rego")).hexdigest()
+        except OSError:
+            return None
+        return {
+            "scp_sha": scp_sha,
+            "rego_sha": rego_sha,
+            "query": self.opa_runner.default_query,
+            "result_type": self.opa_runner.result_type.value,
+            "validator_sha": validator_sha
+        }
+    
+    def _unchanged_report(self, policy_name: str, fingerprint: Optional[Dict[str, Any]]) -> Optional[ValidationReport]:
+        """Rebuild the report of a policy that passed with identical files, if any."""
+        cached = self._passed_policies.get(policy_name)
+        if fingerprint is None or cached is None:
+            return None
+        if any(cached.get(key) != value for key, value in fingerprint.items()):
+            return None
+        
+        total_tests = cached.get("total_tests", 0)
+        return ValidationReport(
+            policy_name=policy_name,
+            syntax_check=SyntaxCheckResult(valid=True),
+            total_tests=total_tests,
+            passed_tests=total_tests,
+            match_rate=1.0 if total_tests else 0.0
+        )
+    
+    def _remember_result(self, report: ValidationReport, fingerprint: Optional[Dict[str, Any]]):
+        """Record a fully passing report so the policy is skipped while unchanged."""
+        if not self.cache_dir or fingerprint is None:
+            return
+        if report.syntax_check.valid and report.total_tests and not report.failed_tests:
+            self._passed_policies[report.policy_name] = dict(fingerprint, total_tests=report.total_tests)
+        else:
+            self._passed_policies.pop(report.policy_name, None)
+    
+    def _progress(self, message: str):
+        """Log a progress line, or buffer it when running in a worker thread."""
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            progress_logger.info(message)
+        else:
+            buffer.append(message)
+    
+    def _validate_buffered(self,
+                           policy_name: str,
+                           concurrency: Optional[int] = None) -> Tuple[ValidationReport, List[str]]:
+        """Validate a policy, returning its report with the progress lines it produced."""
+        self._local.buffer = []
+        self._local.concurrency = concurrency
+        try:
+            return self.validate_policy(policy_name), self._local.buffer
+        finally:
+            self._local.buffer = None
+            self._local.concurrency = None
+    
+    def _batch_concurrency(self) -> int:
+        """Number of batches a policy may have in flight at once."""
+        return (getattr(self._local, "concurrency", None)
+                or self.max_concurrency
+                or os.cpu_count()
+                or 1)
     
     def validate_policy(self, policy_name: str) -> ValidationReport:
         """
@@ -890,105 +2308,346 @@ class SCPValidator:
         if not scp_path.exists():
             raise FileNotFoundError(f"SCP policy not found: {scp_path}")
         
-        with open(scp_path, 'r') as f:
-            scp_json = json.load(f)
-            
+        scp_json = _json_loads(_load_file(scp_path))
+        
         try:
             if isinstance(scp_json, dict):
                 if "Policy" in scp_json and isinstance(scp_json["Policy"], dict):
                     content = scp_json["Policy"].get("Content")
                     if isinstance(content, str):
-                        scp_json = json.loads(content)
+                        scp_json = _json_loads(content)
                 elif "Content" in scp_json and isinstance(scp_json["Content"], str):
-                    scp_json = json.loads(scp_json["Content"])
+                    scp_json = _json_loads(scp_json["Content"])
         except Exception as e:
-            print(f"Warning: Error unwrapping policy content: {e}")
+            logger.warning("Error unwrapping policy content: %s", e)
         
         # Load Rego policy
         rego_path = self.rego_dir / f"{policy_name}.rego"
         if not rego_path.exists():
             raise FileNotFoundError(f"Rego policy not found: {rego_path}")
         
-        with open(rego_path, 'r') as f:
-            rego_code = f.read()
+        rego_code = _load_file(rego_path, text=True)
+        
+        return self.validate_policy_streaming(policy_name, scp_json, rego_code)
+    
+    def validate_policy_streaming(self,
+                                  policy_name: str,
+                                  scp_json: Dict[str, Any],
+                                  rego_code: str,
+                                  batch_size: int = 32) -> ValidationReport:
+        """
+        Validate an already-loaded policy pair as a single streaming pass.
+        
+        Test cases are generated lazily and pushed through SCP evaluation,
+        OPA evaluation and comparison in batches, so the full test-case list
+        is never materialized. Up to max_concurrency batches are evaluated
+        at once, and results are recorded in generation order, so report
+        counters are updated as results arrive.
+        
+        Args:
+            policy_name: Name used in the report
+            scp_json: SCP policy document
+            rego_code: Translated Rego policy
+            batch_size: Number of test cases pulled from the generator at a time
         
+        Returns:
+            ValidationReport with results
+        """
         report = ValidationReport(policy_name=policy_name)
         
         # Syntax check
-        print(f"[1/3] Checking Rego syntax for {policy_name}...")
+        self._progress(f"[1/3] Checking Rego syntax for {policy_name}...")
         report.syntax_check = self.opa_runner.check_syntax(rego_code)
         
         if not report.syntax_check.valid:
-            print(f"  ✗ Syntax check failed!")
+            self._progress(f"  ✗ Syntax check failed!")
             return report
-        print(f"  ✓ Syntax check passed")
-        
-        # Generate test cases
-        print(f"[2/3] Generating test cases from SCP...")
-        test_cases = self.test_generator.generate_from_scp(scp_json)
-        report.total_tests = len(test_cases)
-        print(f"  Generated {len(test_cases)} test cases")
-        
-        # Compare behaviors
-        print(f"[3/3] Comparing SCP and Rego behaviors...")
-        for test_case in test_cases:
-            scp_decision = self.scp_evaluator.evaluate(scp_json, test_case)
-            rego_decision = self.opa_runner.evaluate(
-                rego_code, 
-                test_case.to_opa_input()
-            )
-            
-            match = (scp_decision == rego_decision)
-            
-            result = ComparisonResult(
-                test_case=test_case,
-                scp_decision=scp_decision,
-                rego_decision=rego_decision,
-                match=match,
-                details="" if match else f"Expected {scp_decision.value}, got {rego_decision.value}"
-            )
-            
-            report.comparison_results.append(result)
-            
-            if match:
-                report.passed_tests += 1
-            else:
-                report.failed_tests += 1
+        self._progress(f"  ✓ Syntax check passed")
+        self.opa_runner.prepare(rego_code)
+        
+        # Generation and comparison are fused: each batch is compared as
+        # soon as it is generated
+        self._progress(f"[2/3] Generating test cases from SCP...")
+        self._progress(f"[3/3] Comparing SCP and Rego behaviors...")
+        compiled_scp = self.scp_evaluator.compile(scp_json)
+        test_cases = self.test_generator.iter_from_scp(scp_json)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self._compare_stream(report, compiled_scp, rego_code, test_cases, batch_size))
+        else:
+            # asyncio.run cannot be nested inside a running event loop (e.g.
+            # when called from async code), so compare one batch at a time
+            self._compare_stream_sync(report, compiled_scp, rego_code, test_cases, batch_size)
+        if self.fast_fail and report.failed_tests:
+            self._progress(f"  Stopped at first mismatch (fail-fast)")
         
         if report.total_tests > 0:
             report.match_rate = report.passed_tests / report.total_tests
         
-        print(f"  Completed: {report.passed_tests}/{report.total_tests} tests passed")
+        self._progress(f"  Generated {report.total_tests} test cases")
+        self._progress(f"  Completed: {report.passed_tests}/{report.total_tests} tests passed")
         
         return report
     
-    def validate_all_policies(self) -> List[ValidationReport]:
-        """Validate all policies in the directories."""
-        reports = []
+    async def _compare_stream(self,
+                              report: ValidationReport,
+                              compiled_scp: CompiledPolicy,
+                              rego_code: str,
+                              test_cases: Iterator[TestCase],
+                              batch_size: int):
+        """
+        Compare test cases batch by batch with a bounded window of batches in flight.
         
-        scp_files = list(self.scp_dir.glob("*.json"))
+        Batches are started in generation order and their results recorded in
+        the same order, so reports do not depend on which OPA call finishes
+        first. With fast_fail, no new batches are started after a mismatch and
+        the ones already running are awaited, not abandoned.
+        """
+        window = self._batch_concurrency()
+        # Decisions for inputs already claimed in this run, so duplicate test
+        # cases are reported without being evaluated again
+        seen: Dict[bytes, asyncio.Future] = {}
+        in_flight: deque = deque()
+        stopped = False
+        
+        while not stopped:
+            batch = list(islice(test_cases, batch_size))
+            if batch:
+                in_flight.append(asyncio.ensure_future(
+                    self._compare_batch_async(compiled_scp, rego_code, batch, seen)
+                ))
+            if not in_flight:
+                break
+            if batch and len(in_flight) < window:
+                continue
+            
+            for result in await in_flight.popleft():
+                self._record_result(report, result)
+                if self.fast_fail and not result.match:
+                    stopped = True
+                    break
         
-        print(f"\nFound {len(scp_files)} SCP policies to validate")
-        print(f"{'='*60}\n")
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+    
+    def _compare_stream_sync(self,
+                             report: ValidationReport,
+                             compiled_scp: CompiledPolicy,
+                             rego_code: str,
+                             test_cases: Iterator[TestCase],
+                             batch_size: int):
+        """
+        Compare test cases batch by batch without an event loop.
         
-        for scp_file in scp_files:
-            policy_name = scp_file.stem
-            
+        Records the same results, in the same order, as _compare_stream.
+        """
+        seen: Dict[bytes, Tuple[Decision, Decision]] = {}
+        
+        while True:
+            batch = list(islice(test_cases, batch_size))
+            if not batch:
+                return
+            for result in self._compare_batch(compiled_scp, rego_code, batch, seen):
+                self._record_result(report, result)
+                if self.fast_fail and not result.match:
+                    return
+    
+    async def _compare_batch_async(self,
+                                   compiled_scp: CompiledPolicy,
+                                   rego_code: str,
+                                   batch: List[TestCase],
+                                   seen: Dict[bytes, asyncio.Future]) -> List[ComparisonResult]:
+        """
+        Async form of _compare_batch for batches evaluated concurrently.
+        
+        seen maps canonical inputs to futures of their (SCP, Rego) decisions;
+        inputs claimed by a batch still in flight are awaited, not re-evaluated.
+        """
+        loop = asyncio.get_running_loop()
+        keys = [test_case.opa_input_bytes for test_case in batch]
+        
+        pending: Dict[bytes, int] = {}
+        for idx, key in enumerate(keys):
+            if key not in seen:
+                seen[key] = loop.create_future()
+                pending[key] = idx
+        
+        if pending:
             try:
-                report = self.validate_policy(policy_name)
-                reports.append(report)
-                print(report.generate_summary())
+                rego_decisions = await self.opa_runner.evaluate_batch_async(
+                    rego_code,
+                    list(pending)
+                )
+                scp_decisions = self.scp_evaluator.evaluate_batch(
+                    compiled_scp,
+                    [batch[idx] for idx in pending.values()]
+                )
+                for key, scp_decision, rego_decision in zip(pending, scp_decisions, rego_decisions):
+                    seen[key].set_result((scp_decision, rego_decision))
+            except BaseException as e:
+                for key in pending:
+                    if not seen[key].done():
+                        seen[key].set_exception(e)
+                raise
+        
+        results = []
+        for test_case, key in zip(batch, keys):
+            scp_decision, rego_decision = await seen[key]
+            results.append(self._comparison(test_case, scp_decision, rego_decision))
+        return results
+    
+    def _compare_batch(self,
+                       compiled_scp: CompiledPolicy,
+                       rego_code: str,
+                       batch: List[TestCase],
+                       seen: Optional[Dict[bytes, Tuple[Decision, Decision]]] = None
+                       ) -> List[ComparisonResult]:
+        """
+        Evaluate a batch of test cases against both the SCP and the Rego.
+        
+        Test cases are keyed by their canonical OPA input; only inputs not
+        in seen are evaluated, and their (SCP, Rego) decisions are added
+        to it. Every test case still gets its own ComparisonResult.
+        """
+        if seen is None:
+            seen = {}
+        
+        keys = [test_case.opa_input_bytes for test_case in batch]
+        
+        pending: Dict[bytes, int] = {}
+        for idx, key in enumerate(keys):
+            if key not in seen and key not in pending:
+                pending[key] = idx
+        
+        if pending:
+            rego_decisions = self.opa_runner.evaluate_batch(
+                rego_code,
+                list(pending)
+            )
+            scp_decisions = self.scp_evaluator.evaluate_batch(
+                compiled_scp,
+                [batch[idx] for idx in pending.values()]
+            )
+            for key, scp_decision, rego_decision in zip(pending, scp_decisions, rego_decisions):
+                seen[key] = (scp_decision, rego_decision)
+        
+        results = []
+        for test_case, key in zip(batch, keys):
+            scp_decision, rego_decision = seen[key]
+            results.append(self._comparison(test_case, scp_decision, rego_decision))
+        return results
+    
+    @staticmethod
+    def _comparison(test_case: TestCase, scp_decision: Decision, rego_decision: Decision) -> ComparisonResult:
+        """Build the comparison result for one test case."""
+        match = (scp_decision == rego_decision)
+        return ComparisonResult(
+            test_case=test_case,
+            scp_decision=scp_decision,
+            rego_decision=rego_decision,
+            match=match,
+            details="" if match else f"Expected {scp_decision.value}, got {rego_decision.value}"
+        )
+    
+    @staticmethod
+    def _record_result(report: ValidationReport, result: ComparisonResult):
+        """Append a comparison result and update the report counters."""
+        report.comparison_results.append(result)
+        report.total_tests += 1
+        if result.match:
+            report.passed_tests += 1
+        else:
+            report.failed_tests += 1
+    
+    def validate_all_policies(self,
+                              max_workers: Optional[int] = None,
+                              force: bool = False) -> List[ValidationReport]:
+        """
+        Validate all policies in the directories.
+        
+        Policies are validated concurrently in a thread pool, since the time
+        is dominated by OPA subprocesses. Each policy's progress and summary
+        are logged to progress_logger as one record when it finishes, and
+        warnings and errors go to the module logger, so worker threads never
+        write to stdout directly. With fast_fail, the first failing policy
+        cancels the ones not yet started.
+        
+        With a cache_dir, policies whose SCP and Rego files are unchanged
+        since a fully passing run are reported from the cache instead.
+        
+        Args:
+            max_workers: Number of worker threads (defaults to the CPU count;
+                         always 1 with the OPA server backend)
+            force: Validate every policy, ignoring previously passing results
+        
+        Returns:
+            Reports in the same order as the SCP files were found
+        """
+        # scandir reports entry types from the directory listing itself, so
+        # regular files need no extra stat; hidden files are skipped like glob
+        try:
+            with os.scandir(self.scp_dir) as entries:
+                names = [
+                    entry.name[:-len(".json")] for entry in entries
+                    if entry.name.endswith(".json") and not entry.name.startswith(".") and entry.is_file()
+                ]
+        except FileNotFoundError:
+            names = []
+        
+        progress_logger.info(f"\nFound {len(names)} SCP policies to validate\n{'='*60}\n")
+        
+        reports_by_name: Dict[str, ValidationReport] = {}
+        fingerprints: Dict[str, Optional[Dict[str, Any]]] = {}
+        to_validate = []
+        for name in names:
+            fingerprints[name] = self._policy_fingerprint(name) if self.cache_dir else None
+            report = None if force else self._unchanged_report(name, fingerprints[name])
+            if report is None:
+                to_validate.append(name)
+            else:
+                reports_by_name[name] = report
+                progress_logger.info(f"Skipping {name}: unchanged since its last passing run")
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        if isinstance(self.opa_runner, OPAServerRunner) and max_workers > 1:
+            # The server holds one policy at a time; interleaved policies
+            # would re-upload and recompile on every query
+            logger.debug("OPA server backend validates one policy at a time; ignoring max_workers=%d", max_workers)
+            max_workers = 1
+        # Split the batch concurrency between the policies running at once
+        concurrency = self.max_concurrency or max(1, (os.cpu_count() or 1) // max_workers)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._validate_buffered, name, concurrency): name
+                for name in to_validate
+            }
             
-            except FileNotFoundError as e:
-                print(f"Warning: {e}")
-                continue
-            except Exception as e:
-                print(f"Error validating {policy_name}: {e}")
-                import traceback
-                traceback.print_exc()
-                continue
+            for future in as_completed(futures):
+                policy_name = futures[future]
+                
+                try:
+                    report, progress = future.result()
+                    reports_by_name[policy_name] = report
+                    self._remember_result(report, fingerprints[policy_name])
+                    # One record per policy, so its lines are written in a single flush
+                    progress_logger.info("\n".join(progress + [report.generate_summary()]))
+                    
+                    if self.fast_fail and (report.failed_tests or not report.syntax_check.valid):
+                        # Drop policies that have not started; running ones finish but are ignored
+                        for pending in futures:
+                            pending.cancel()
+                        break
+                
+                except FileNotFoundError as e:
+                    logger.warning("%s", e)
+                    continue
+                except Exception:
+                    logger.exception("Error validating %s", policy_name)
+                    continue
         
-        return reports
+        return [reports_by_name[name] for name in names if name in reports_by_name]
     
     def generate_summary_report(self, reports: List[ValidationReport]) -> str:
         """Generate an overall summary of all validation reports."""
@@ -998,11 +2657,14 @@ class SCPValidator:
         summary.append("="*60)
         
         total_policies = len(reports)
-        total_tests = sum(r.total_tests for r in reports)
-        total_passed = sum(r.passed_tests for r in reports)
-        total_failed = sum(r.failed_tests for r in reports)
-        
-        policies_with_issues = [r for r in reports if r.failed_tests > 0 or not r.syntax_check.valid]
+        total_tests = total_passed = total_failed = 0
+        policies_with_issues = []
+        for r in reports:
+            total_tests += r.total_tests
+            total_passed += r.passed_tests
+            total_failed += r.failed_tests
+            if r.failed_tests > 0 or not r.syntax_check.valid:
+                policies_with_issues.append(r)
         
         summary.append(f"\nTotal Policies Validated: {total_policies}")
         summary.append(f"Total Tests Executed: {total_tests}")
@@ -1016,10 +2678,11 @@ class SCPValidator:
         
         if policies_with_issues:
             summary.append(f"\nPolicies requiring attention:")
-            for report in policies_with_issues:
-                summary.append(f"  - {report.policy_name}: "
-                             f"{report.failed_tests}/{report.total_tests} tests failed "
-                             f"({report.match_rate:.1%} match rate)")
+            summary.extend(
+                f"  - {r.policy_name}: {r.failed_tests}/{r.total_tests} tests failed "
+                f"({r.match_rate:.1%} match rate)"
+                for r in policies_with_issues
+            )
         
         summary.append("\n" + "="*60 + "\n")
         return "\n".join(summary)
@@ -1071,9 +2734,51 @@ def main():
         action="store_true",
         help="Exit with non-zero code if any tests fail (useful for CI)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of policies validated in parallel (default: CPU count; always 1 with --opa-backend server)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Number of test-case batches per policy evaluated at once (default: CPU count split across workers)"
+    )
+    parser.add_argument(
+        "--opa-backend",
+        type=str,
+        choices=["cli", "server", "wasm"],
+        default="cli",
+        help="How Rego is evaluated: cli (opa eval per batch), server (persistent OPA server; "
+             "one policy loaded at a time, so policies are validated sequentially and --workers is ignored) "
+             "or wasm (in-process, needs opa-wasm)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        nargs="?",
+        const=".validator_cache",
+        default=None,
+        help="Persist OPA syntax checks and decisions across runs (default dir: .validator_cache)"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Validate every policy, even ones unchanged since a passing run with --cache-dir"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log debug diagnostics (invalid statements, unexpected Rego result types, OPA errors)"
+    )
     
     args = parser.parse_args()
     
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(levelname)s %(name)s: %(message)s")
+    
     result_type_map = {
         "deny_set": RegoResultType.DENY_SET,
         "allow_bool": RegoResultType.ALLOW_BOOL,
@@ -1087,7 +2792,11 @@ def main():
             rego_dir=args.rego_dir,
             opa_path=args.opa_path,
             rego_query=args.rego_query,
-            rego_result_type=result_type
+            rego_result_type=result_type,
+            opa_backend=args.opa_backend,
+            cache_dir=args.cache_dir,
+            fast_fail=args.fail_on_mismatch,
+            max_concurrency=args.concurrency
         )
         
         has_failures = False
@@ -1099,7 +2808,7 @@ def main():
             if not report.syntax_check.valid or report.failed_tests > 0:
                 has_failures = True
         else:
-            reports = validator.validate_all_policies()
+            reports = validator.validate_all_policies(max_workers=args.workers, force=args.force)
             print(validator.generate_summary_report(reports))
             
             for report in reports:
@@ -1107,6 +2816,9 @@ def main():
                     has_failures = True
                     break
         
+        validator.opa_runner.save_cache()
+        validator.save_results()
+        
         if has_failures:
             if args.fail_on_mismatch:
                 print("\n⚠ Validation failures detected - exiting with code 1")
@@ -1120,10 +2832,9 @@ def main():
     
     except Exception as e:
         print(f"Error: {e}")
-        import traceback
         traceback.print_exc()
         return 1
 
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -1,12 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError, NoCredentialsError
 from src.Keywords import Keywords
 from src.models.SCP import SCP
 
 
+# enough pooled connections for the describe_policy fan-out
+# (botocore defaults to 10); Organizations throttles hard, so adaptive
+# retries back off and rate-limit the client instead of failing the fetch
+_CLIENT_CONFIG = Config(
+    max_pool_connections=50,
+    retries={'mode': 'adaptive', 'max_attempts': 10},
+)
+
+# largest page list_policies accepts (MaxResults is capped at 20)
+_LIST_PAGE_SIZE = 20
+
+_SCP_FILTER = Keywords.SERVICE_CONTROL_POLICY.value
+
+
+# building a session/client loads the botocore service models,
+# so share them across fetchers with the same profile and region
+@lru_cache(maxsize=32)
+def _get_session(profile, region):
+    return boto3.Session(profile_name=profile, region_name=region)
+
+
+@lru_cache(maxsize=32)
+def _get_client(profile, region, service):
+    return _get_session(profile, region).client(service, config=_CLIENT_CONFIG)
+
+
 class SCPFetcher:
-    def __init__(self, config=None, organizations_client=None):
+    def __init__(self, config=None, organizations_client=None, max_workers=4,
+                 session=None):
         self.config = config or {}
+        # describe_policy calls are issued concurrently, boto3 clients are thread-safe;
+        # kept small because Organizations allows only a few requests per second
+        self.max_workers = max_workers
 
         # config might look something like this as input arg
 
@@ -16,53 +50,70 @@ class SCPFetcher:
         #     'region': 'us-east-1'
         # }
 
-        # TODO: make a session factory
         if organizations_client:
             self.organizations_client = organizations_client
             return
 
+        # caller-supplied session, e.g. one already shared with other clients
+        if session:
+            self.organizations_client = session.client('organizations', config=_CLIENT_CONFIG)
+            return
+
         try:
+            region = self.config.get('region', 'us-east-1')
             # try to get session via input params
-            if self.config.get('profile'):
-                session = boto3.Session(
-                    profile_name=self.config['profile'],
-                    region_name=self.config.get('region', 'us-east-1')
-                )
-            elif self.config.get('aws_access_key_id') and self.config.get('aws_secret_access_key'):
+            if self.config.get('aws_access_key_id') and self.config.get('aws_secret_access_key') \
+                    and not self.config.get('profile'):
+                # explicit keys are not kept in the shared cache
                 session = boto3.Session(
                     aws_access_key_id=self.config['aws_access_key_id'],
                     aws_secret_access_key=self.config['aws_secret_access_key'],
-                    region_name=self.config.get('region', 'us-east-1'),
-                )
-            else:
-                # default to env vars
-                session = boto3.Session(
-                    region_name=self.config.get('region', 'us-east-1')
+                    region_name=region,
                 )
+                if session.get_credentials() is None:
+                    raise NoCredentialsError
+                self.organizations_client = session.client('organizations', config=_CLIENT_CONFIG)
+                return
 
-            if session.get_credentials() is None:
+            # profile if given, otherwise default to env vars
+            profile = self.config.get('profile')
+            if _get_session(profile, region).get_credentials() is None:
                 raise NoCredentialsError
 
-            self.organizations_client = session.client('organizations')
+            self.organizations_client = _get_client(profile, region, 'organizations')
         except NoCredentialsError:
             raise Exception("AWS credentials not found. Please configure "
                             "via AWS CLI, environment variables, or pass "
                             "them in config.")
 
     # NOTE: will we have to make these async at any point?
-    def fetch_scp(self, Filter=Keywords.SERVICE_CONTROL_POLICY.value):
+    def fetch_scp(self, Filter=_SCP_FILTER,
+                  include_content=True):
         try:
-            scps = []
             paginator = self.organizations_client.get_paginator('list_policies')
-            for page in paginator.paginate(Filter=Filter):
-                for retrieved_policy in page['Policies']:
-                    policy_details = self.organizations_client.describe_policy(
-                        PolicyId=retrieved_policy['Id']
-                    )
-                    # NOTE: do something with data handling here
-                    # not using handler, should we use it or just go like this?
-                    scp_policy: SCP = policy_details['Policy']
-                    scps.append(scp_policy)
+            summaries = [
+                retrieved_policy
+                for page in paginator.paginate(
+                    Filter=Filter,
+                    PaginationConfig={'PageSize': _LIST_PAGE_SIZE}
+                )
+                for retrieved_policy in page['Policies']
+            ]
+            # list_policies already has everything but Content, so
+            # describe_policy is only needed when the content is wanted
+            if not include_content:
+                return [{'PolicySummary': summary} for summary in summaries]
+            if not summaries:
+                return []
+            policy_ids = [summary['Id'] for summary in summaries]
+
+            # one describe_policy round-trip per policy, so overlap them;
+            # map keeps the listing order
+            workers = min(self.max_workers, len(policy_ids))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # NOTE: do something with data handling here
+                # not using handler, should we use it or just go like this?
+                scps = list(executor.map(self._describe_policy, policy_ids))
 
             # NOTE: opa only handles json/yaml, so we can serialize
             # this when translating
@@ -70,3 +121,9 @@ class SCPFetcher:
         except ClientError as e:
             # maybe add some better logging here
             raise Exception(f"Error fetching SCPs: {e}")
+
+    def _describe_policy(self, policy_id) -> SCP:
+        policy_details = self.organizations_client.describe_policy(
+            PolicyId=policy_id
+        )
+        return policy_details['Policy']
@@ -1,41 +1,70 @@
+import asyncio
 import boto3
+import hashlib
+import json
+import logging
+import os
 import re
-import random
-import time
-from botocore.exceptions import ClientError, BotoCoreError, EndpointConnectionError
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
 
 # takes SCP Json as input, feeds to Claude with prompt and spits out rego policy 
 # creates bedrock client to connect to claude 
-client = boto3.client("bedrock-runtime", region_name = "us-east-1")
+# module-level so warm invocations reuse the client and its pooled,
+# kept-alive HTTPS connections; adaptive retries handle throttling and
+# connection errors
+client = boto3.client(
+    "bedrock-runtime",
+    region_name = "us-east-1",
+    config = Config(
+        max_pool_connections=50,
+        tcp_keepalive=True,
+        retries={"max_attempts": 6, "mode": "adaptive"},
+    )
+)
 
 # set model id
 #model_id = "anthropic.claude-sonnet-4-5-20250929-v1:0"
 model_id = "global.anthropic.claude-sonnet-4-5-20250929-v1:0" # have to use the cross-region inference profile ID instead for this model
 
-def _call_with_backoff(func, *args, max_retries=6, base_delay=0.5, **kwargs):
-    for attempt in range(1, max_retries + 1):
-        try:
-            return func(*args, **kwargs)
-        except ClientError as e:
-            code = e.response.get("Error", {}).get("Code", "")
-            if code in ("ThrottlingException", "TooManyRequestsException", "Throttling"):
-                headers = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {}) or {}
-                ra = headers.get("retry-after") or headers.get("Retry-After")
-                if ra:
-                    try:
-                        sleep = float(ra)
-                    except Exception:
-                        sleep = random.uniform(0, base_delay * (2 ** (attempt - 1)))
-                else:
-                    sleep = random.uniform(0, base_delay * (2 ** (attempt - 1)))
-                time.sleep(sleep)
-                continue
-            raise
-        except (BotoCoreError, EndpointConnectionError):
-            sleep = random.uniform(0, base_delay * (2 ** (attempt - 1)))
-            time.sleep(sleep)
-            continue
-    raise Exception("Max retries exceeded for API call")
+# optional S3 cache of validated rego keyed by model + first-attempt prompt, so
+# re-invocations for an already converted scp skip the bedrock call. only the
+# store step writes it, after the rego has passed syntax and semantic validation
+ENABLE_LLM_CACHE = os.getenv("ENABLE_LLM_CACHE", "false").lower() == "true"
+LLM_CACHE_BUCKET = os.getenv("LLM_CACHE_BUCKET", "")
+LLM_CACHE_PREFIX = os.getenv("LLM_CACHE_PREFIX", "llm-cache/generate/")
+s3 = boto3.client("s3")
+
+# requirements every policy in a batch must meet; the single-scp prompt keeps its own list
+_REGO_REQUIREMENTS = """    3. The policy MUST exactly replicate the SCP’s logic.
+    4. Preserve all condition logic, including:
+    - StringLike, StringEquals, ArnLike
+    - NotAction, NotResource, Deny overrides
+    - Condition operators
+    5. Do NOT include explanations or comments unless formatted as Rego comments.
+    6. The output MUST define the following required entrypoint so it can be evaluated by another Lambda:
+    THE PACKAGE NAME MUST ALWAYS BE EXACTLY:
+    package scp
+    7. IMPORTANT (OPA syntax compatibility): Target the OPA binary used by the validator which requires the `if` keyword for rule bodies. Produce rules in one of these compatible forms (examples):
+       - Boolean rule using `if`:
+         deny = true if input.Action and input.Resource and not is_approved_region
+       - Headless rule with `if`:
+         deny if input.Action and input.Resource and not is_approved_region { }
+       If you prefer block style, use the `if` form consistently so the policy parses with the validator's OPA version.
+
+    ## Required final rule (choose one depending on the SCP's intended semantics):
+    # deny conditions
+    # allow conditions
+    # decision = { "allow": allow, "deny": deny }
+
+    Your output MUST include one and only one of: deny, allow, or decision.
+
+    This rule will be evaluated using:
+    opa eval --format=json -d policy.rego "data.scp"
+"""
 
 
 # build prompt creates general prompt for LLM with inputscp, previous rego, and validation errors if applicable. 
@@ -91,27 +120,160 @@ def build_prompt(inputSCP, previous_rego="", validation_errors=""):
 
     BEGIN OUTPUT (Rego only, no markdown):
     """
-    prompt = template.format(scp=inputSCP, prev_rego=previous_rego, errors=validation_errors)
+    # compact JSON rather than the dict's repr; indentation only costs input tokens
+    scp_str = json.dumps(inputSCP, separators=(",", ":")) if isinstance(inputSCP, dict) else str(inputSCP)
+    prompt = template.format(scp=scp_str, prev_rego=previous_rego, errors=validation_errors)
     return prompt
 
 
+# build batch prompt asks for several first-attempt policies in one call, answered as JSON
+def build_batch_prompt(inputSCPs):
+    template = """
+    <<CONTEXT>> 
+    You are an expert in AWS IAM, Service Control Policies (SCPs), and OPA Rego.
+
+    Your task: Convert EACH of the following AWS SCP JSON documents into its own
+    functionally equivalent OPA Rego policy. Each policy must enforce the exact same
+    permission boundaries, conditions, and semantics as its SCP.
+
+    INPUT SCPS (JSON array of {{"id": ..., "scp": ...}}):
+    {scps}
+
+    REQUIREMENTS (for every policy):
+    1. Each policy is raw Rego code - DO NOT wrap it in markdown code fences or backticks.
+    2. Convert every SCP independently, with exactly one policy per input id.
+{rules}
+    OUTPUT FORMAT:
+    Return ONLY one JSON object, with no markdown, of the form
+    {{"results": [{{"id": <id from the input>, "rego": "<the Rego policy as a JSON string>"}}]}}
+
+    BEGIN OUTPUT (JSON only, no markdown):
+    """
+    scps = json.dumps([{"id": i, "scp": scp} for i, scp in inputSCPs], separators=(",", ":"))
+    return template.format(scps=scps, rules=_REGO_REQUIREMENTS)
+
+
+def _cache_key(scp):
+    # keyed on the first-attempt prompt; retries carry rego/errors and are never cached
+    prompt = build_prompt(scp)
+    digest = hashlib.sha256(f"{model_id}\0{prompt}".encode("utf-8")).hexdigest()
+    return f"{LLM_CACHE_PREFIX}{digest}.rego"
+
+
+def _cache_enabled():
+    return ENABLE_LLM_CACHE and bool(LLM_CACHE_BUCKET)
+
+
+def _get_cached_rego(key):
+    if not _cache_enabled():
+        return None
+    try:
+        obj = s3.get_object(Bucket=LLM_CACHE_BUCKET, Key=key)
+        return obj["Body"].read().decode("utf-8")
+    except Exception:
+        # a miss (or an unreadable cache) just means calling the model
+        return None
+
+
+def _generated(scp, rego_output):
+    return {
+        "scp": scp,
+        "generated_rego": rego_output,
+        # the store step writes the rego under this key once it has been validated
+        "cache_key": _cache_key(scp) if _cache_enabled() else "",
+        "errors": ""
+    }
+
+
+# upper bound on concurrent converse calls for a batch; matches the client's pool
+MAX_CONCURRENT_GENERATIONS = 50
+# scps converted per converse call in the batch form; 1 keeps one call per scp
+SCP_BATCH_SIZE = max(1, int(os.getenv("SCP_BATCH_SIZE", "1")))
+
+
+def _generate_group(scps):
+    results = [None] * len(scps)
+    pending = []
+    for i, scp in enumerate(scps):
+        cached = _get_cached_rego(_cache_key(scp))
+        if cached is not None:
+            results[i] = _generated(scp, cached)
+        else:
+            pending.append(i)
+
+    if len(pending) > 1:
+        try:
+            prompt = build_batch_prompt([(i, scps[i]) for i in pending])
+            response = client.converse(
+                modelId=model_id,
+                messages=[{
+                    "role": "user",
+                    "content": [{"text": prompt}]
+                }],
+                inferenceConfig={
+                    "maxTokens":8192
+                }
+            )
+            answer = strip_fenced_code(response["output"]["message"]["content"][0]["text"])
+            for item in json.loads(answer)["results"]:
+                i = item.get("id")
+                rego_output = strip_fenced_code(item.get("rego", ""))
+                if isinstance(i, int) and i in pending and rego_output:
+                    results[i] = _generated(scps[i], rego_output)
+        except Exception as e:
+            logger.warning("Batched generation failed, falling back to one call per SCP: %s", e)
+
+    # anything the batched call did not answer goes through the single-scp path
+    for i in pending:
+        if results[i] is None:
+            results[i] = lambda_handler({"scp": scps[i]}, None)
+    return results
+
+
+async def _generate_batch(scps):
+    if not scps:
+        return []
+    # boto3 blocks, so every scp gets its own worker thread
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(
+        ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_GENERATIONS, len(scps)))
+    )
+    if SCP_BATCH_SIZE > 1:
+        groups = [scps[i:i + SCP_BATCH_SIZE] for i in range(0, len(scps), SCP_BATCH_SIZE)]
+        grouped = await asyncio.gather(
+            *(asyncio.to_thread(_generate_group, group) for group in groups)
+        )
+        return [result for group in grouped for result in group]
+    return await asyncio.gather(
+        *(asyncio.to_thread(lambda_handler, {"scp": scp}, None) for scp in scps)
+    )
+
+
 def lambda_handler(event, context): 
+    if "scps" in event:
+        # batch form: generate every scp concurrently, results in input order
+        return {"results": asyncio.run(_generate_batch(event["scps"]))}
     try: 
         scp = event["scp"]
         prev_rego = event.get("previous_rego","") # fetch previous rego that failed if exists
-        errors = event.get("validation_errors","") ## if previous rego did not pass we need the validation errors to feed context to Claude
+        errors = event.get("errors") or event.get("validation_errors","") ## if previous rego did not pass we need the validation errors to feed context to Claude
         if "scp" not in event:
             return {
                 "scp": scp,
                 "previous_rego": prev_rego,
                 "generated_rego": "",
+                "cache_key": "",
                 "errors": "Missing SCP in event"
             }
         # build prompt with args
         prompt = build_prompt(scp, prev_rego, errors)
+        if not (prev_rego or errors):
+            # only a first attempt can reuse a validated policy; a retry must regenerate
+            cached = _get_cached_rego(_cache_key(scp))
+            if cached is not None:
+                return _generated(scp, cached)
         # call claude passing arguments
-        response = _call_with_backoff(
-            client.converse,
+        response = client.converse(
             modelId=model_id,
             messages=[{
                 "role": "user",
@@ -124,31 +286,33 @@ def lambda_handler(event, context):
         content = response["output"]["message"]["content"]
         rego_output = content[0]["text"]
         rego_output = strip_fenced_code(rego_output)
-        return {
-            "scp": scp, 
-            "generated_rego": rego_output,
-            "errors": ""
-        }
+        return _generated(scp, rego_output)
     except Exception as e:
-        import traceback
-        traceback_str = traceback.format_exc()
-        print(f"Error in lambda function: ", traceback_str)
+        # logged once with its stack trace; the caller only gets the message
+        logger.exception("Error in lambda function generate")
         return {
             "scp": scp,
             "previous_rego": prev_rego,
             "generated_rego": "",
+            "cache_key": "",
             "errors": f"Error in lambda function generate: {str(e)}"
         }
 
 
+# fenced code block in LLM output; dotall makes it match all characters
+_FENCE_RE = re.compile(r"```(?:\w+)?\s*\n(.*?)```", re.DOTALL)
+
+
 def strip_fenced_code(text): 
     """Remove markdown code fences from LLM output"""
     if not text:
         return text
     text = text.strip()
+    if "```" not in text:
+        # model already followed the no-markdown instruction
+        return text
     
-    pattern = r"```(?:\w+)?\s*\n(.*?)```"
-    match = re.search(pattern, text, re.DOTALL) # dotall makes it match all characters
+    match = _FENCE_RE.search(text)
 
     if match:
         return match.group(1).strip() # if its a match then remove it 
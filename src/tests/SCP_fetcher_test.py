@@ -27,3 +27,50 @@ class TestSCPFetcher(unittest.TestCase):
         result = fetcher.fetch_scp()
 
         self.assertEqual(result, [])
+
+    def test_policies_described_in_listing_order(self):
+        """Test that concurrent describe_policy calls keep the listing order."""
+        mock_client = Mock()
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {'Policies': [{'Id': 'p-1'}, {'Id': 'p-2'}]},
+            {'Policies': [{'Id': 'p-3'}]},
+        ]
+        mock_client.get_paginator.return_value = mock_paginator
+        mock_client.describe_policy.side_effect = (
+            lambda PolicyId: {'Policy': {'Id': PolicyId}}
+        )
+
+        fetcher = SCPFetcher(organizations_client=mock_client, max_workers=3)
+        result = fetcher.fetch_scp()
+
+        self.assertEqual([p['Id'] for p in result], ['p-1', 'p-2', 'p-3'])
+        self.assertEqual(mock_client.describe_policy.call_count, 3)
+        self.assertEqual(
+            mock_paginator.paginate.call_args.kwargs['PaginationConfig'],
+            {'PageSize': 20}
+        )
+
+    def test_summaries_without_content_skip_describe(self):
+        """Test that include_content=False makes no describe_policy calls."""
+        mock_client = Mock()
+        mock_paginator = Mock()
+        mock_paginator.paginate.return_value = [
+            {'Policies': [{'Id': 'p-1', 'Name': 'FullAWSAccess'}]}
+        ]
+        mock_client.get_paginator.return_value = mock_paginator
+
+        fetcher = SCPFetcher(organizations_client=mock_client)
+        result = fetcher.fetch_scp(include_content=False)
+
+        self.assertEqual(result, [{'PolicySummary': {'Id': 'p-1', 'Name': 'FullAWSAccess'}}])
+        mock_client.describe_policy.assert_not_called()
+
+    def test_supplied_session_is_used(self):
+        """Test that a caller-supplied session builds the organizations client."""
+        mock_session = Mock()
+
+        fetcher = SCPFetcher(session=mock_session)
+
+        self.assertIs(fetcher.organizations_client, mock_session.client.return_value)
+        self.assertEqual(mock_session.client.call_args.args, ('organizations',))
@@ -12,16 +12,27 @@ This test suite verifies all the critical fixes:
 Run with: python validation_test.py
 """
 
+import contextlib
+import io
+import os
 import unittest
+from unittest import mock
 import json
+from src.models import scp_validation
 from src.models.scp_validation import (
+    CompiledPolicy,
+    OPAWasmRunner,
+    create_opa_runner,
     TestCase,
     TestCaseGenerator,
     SCPEvaluator,
     OPARunner,
     Effect,
     Decision,
-    RegoResultType
+    RegoResultType,
+    SCPValidator,
+    SyntaxCheckResult,
+    _EFFECT_CODES
 )
 
 OPARunner._check_opa_available = lambda self: None
@@ -450,6 +461,57 @@ class TestMissingFieldsWildcard(unittest.TestCase):
         
         test = TestCase(action="s3:GetObject", resource="*")
         self.assertEqual(evaluator.evaluate(scp, test), Decision.DENY)
+    
+    def test_literal_patterns_match_exactly(self):
+        """Patterns without * are exact, case-sensitive matches"""
+        evaluator = SCPEvaluator()
+        
+        self.assertTrue(evaluator._matches_pattern("s3:GetObject", "s3:GetObject"))
+        self.assertFalse(evaluator._matches_pattern("s3:GetObjectAcl", "s3:GetObject"))
+        self.assertFalse(evaluator._matches_pattern("s3:getobject", "s3:GetObject"))
+        self.assertTrue(evaluator._matches_pattern("s3:GetObjectAcl", "s3:GetObject*"))
+        self.assertTrue(evaluator._matches_pattern("arn:aws:s3:::b/k.txt", "arn:aws:s3:::b/*.txt"))
+    
+    def test_specialized_wildcard_shapes(self):
+        """Prefix, suffix and infix patterns agree with the general regex"""
+        from src.models.scp_validation import _wildcard_matcher, _wildcard_regex
+        
+        values = ["s3:GetObject", "arn:aws:iam::1:root", "role/admin-ops", "", "admin"]
+        for pattern in ["s3:*", "*:root", "*admin*", "s3:GetObject", "*", "s3:*Object*", "*a*n"]:
+            for value in values:
+                self.assertEqual(_wildcard_matcher(pattern)(value),
+                                 _wildcard_regex(pattern).fullmatch(value) is not None,
+                                 f"{pattern!r} vs {value!r}")
+    
+    def test_wildcards_match_embedded_newlines(self):
+        """Single-pattern and union matching agree on values containing newlines"""
+        from src.models.scp_validation import _union_regex, _wildcard_matcher, _wildcard_regex
+        
+        values = ["line1\nline2", "a\nb", "ab\n", "x?y"]
+        for pattern in ["*", "line1*", "a?b", "a*b", "*\n*", "ab"]:
+            for value in values:
+                single = _wildcard_regex(pattern).fullmatch(value) is not None
+                self.assertEqual(single, _union_regex([pattern]).fullmatch(value) is not None,
+                                 f"{pattern!r} vs {value!r}")
+                self.assertEqual(single, _wildcard_matcher(pattern)(value), f"{pattern!r} vs {value!r}")
+        
+        self.assertTrue(_wildcard_matcher("a?b")("a\nb"))
+        self.assertFalse(_wildcard_matcher("a?b")("ab\n"))
+    
+    def test_question_mark_matches_one_character(self):
+        """? matches exactly one character, in patterns and compiled statements"""
+        evaluator = SCPEvaluator()
+        
+        self.assertTrue(evaluator._matches_pattern("ec2:RunInstance1", "ec2:RunInstance?"))
+        self.assertFalse(evaluator._matches_pattern("ec2:RunInstance", "ec2:RunInstance?"))
+        self.assertFalse(evaluator._matches_pattern("ec2:RunInstance12", "ec2:RunInstance?"))
+        self.assertTrue(evaluator._matches_pattern("s3:GetObject", "s?:Get*"))
+        
+        scp = {"Statement": [{"Effect": "Allow", "Action": "s?:Get*", "Resource": "arn:aws:s3:::b?"}]}
+        self.assertEqual(evaluator.evaluate(scp, TestCase(action="s3:GetObject", resource="arn:aws:s3:::b1")),
+                         Decision.ALLOW)
+        self.assertEqual(evaluator.evaluate(scp, TestCase(action="s3:GetObject", resource="arn:aws:s3:::b12")),
+                         Decision.DENY)
 
 
 class TestRegoResultTypes(unittest.TestCase):
@@ -524,6 +586,457 @@ class TestRegoResultTypes(unittest.TestCase):
         )
 
 
+class TestOPARunnerPolicyFiles(unittest.TestCase):
+    """Test reuse of scratch policy files across OPA calls"""
+    
+    def test_policy_file_written_once_per_content(self):
+        """Same Rego code should map to one file; different code to another"""
+        runner = OPARunner()
+        rego_a = "package aws.scp\n\ndeny contains \"a\" if { true }\n"
+        rego_b = "package aws.scp\n\ndeny contains \"b\" if { true }\n"
+        
+        path_a = runner._policy_file(rego_a)
+        self.assertEqual(runner._policy_file(rego_a), path_a)
+        self.assertNotEqual(runner._policy_file(rego_b), path_a)
+        self.assertTrue(path_a.endswith(".rego"))
+        
+        with open(path_a) as f:
+            self.assertEqual(f.read(), rego_a)
+
+
+class TestOPABackends(unittest.TestCase):
+    """Test selection of the OPA evaluation backend"""
+    
+    def test_wasm_entrypoint_from_query(self):
+        """Plain data references map to WASM entrypoints; other queries do not"""
+        self.assertEqual(OPAWasmRunner._entrypoint("data.aws.scp.deny"), "aws/scp/deny")
+        self.assertIsNone(OPAWasmRunner._entrypoint("data.aws.scp.deny[x]"))
+        self.assertIsNone(OPAWasmRunner._entrypoint("input.action"))
+    
+    @unittest.skipIf(scp_validation.OPAPolicy is not None, "opa-wasm is installed")
+    def test_wasm_backend_falls_back_to_cli(self):
+        """Without opa-wasm the wasm backend uses the CLI runner"""
+        runner = create_opa_runner(backend="wasm")
+        self.assertIs(type(runner), OPARunner)
+    
+    def test_unknown_backend_rejected(self):
+        """Unknown backend names raise ValueError"""
+        with self.assertRaises(ValueError):
+            create_opa_runner(backend="grpc")
+
+
+OPA_BINARY = os.path.join(
+    os.path.dirname(__file__), "..", "..", "PolicySynthApp", "layers", "opa", "opt", "bin", "opa"
+)
+
+
+@unittest.skipUnless(os.access(OPA_BINARY, os.X_OK), "OPA binary not available")
+class TestOPABatchEvaluation(unittest.TestCase):
+    """Test that batched OPA evaluation agrees with per-input evaluation"""
+    
+    REGO = """package aws.scp
+
+deny contains msg if {
+  input.action == "s3:DeleteBucket"
+  msg := "no bucket deletion"
+}
+
+allow if input.action == "s3:GetObject"
+"""
+    
+    def test_batch_matches_single_evaluation(self):
+        """evaluate_batch returns the same decisions as evaluate, in order"""
+        runner = OPARunner(opa_path=OPA_BINARY)
+        inputs = [
+            TestCase(action=action, resource="*").to_opa_input()
+            for action in ["s3:DeleteBucket", "s3:GetObject", "ec2:RunInstances"]
+        ]
+        
+        for query, result_type in [("data.aws.scp.deny", RegoResultType.DENY_SET),
+                                   ("data.aws.scp.allow", RegoResultType.ALLOW_BOOL)]:
+            expected = [runner.evaluate(self.REGO, i, query, result_type) for i in inputs]
+            self.assertEqual(runner.evaluate_batch(self.REGO, inputs, query, result_type), expected)
+    
+    def test_encoded_inputs_match_documents(self):
+        """Pre-encoded test case inputs evaluate like dicts on both OPA backends"""
+        test_cases = [TestCase(action=action, resource="*")
+                      for action in ["s3:DeleteBucket", "s3:GetObject", "ec2:RunInstances"]]
+        expected = OPARunner(opa_path=OPA_BINARY).evaluate_batch(
+            self.REGO, [tc.to_opa_input() for tc in test_cases]
+        )
+        
+        server = create_opa_runner(opa_path=OPA_BINARY, backend="server")
+        self.addCleanup(server.close)
+        for runner in [OPARunner(opa_path=OPA_BINARY), server]:
+            encoded = [tc.opa_input_bytes for tc in test_cases]
+            self.assertEqual(runner.evaluate_batch(self.REGO, encoded), expected)
+            self.assertEqual(runner.evaluate(self.REGO, encoded[0]), expected[0])
+    
+    def test_batch_empty_inputs(self):
+        """An empty batch does not invoke OPA"""
+        runner = OPARunner(opa_path=OPA_BINARY)
+        self.assertEqual(runner.evaluate_batch(self.REGO, []), [])
+    
+    def test_server_backend_matches_cli(self):
+        """The persistent server gives the same decisions as 'opa eval', across policy swaps"""
+        cli = OPARunner(opa_path=OPA_BINARY)
+        server = create_opa_runner(opa_path=OPA_BINARY, backend="server")
+        self.addCleanup(server.close)
+        
+        other_rego = self.REGO.replace("s3:DeleteBucket", "s3:GetObject")
+        inputs = [
+            TestCase(action=action, resource="*").to_opa_input()
+            for action in ["s3:DeleteBucket", "s3:GetObject"]
+        ]
+        
+        for rego in [self.REGO, other_rego, self.REGO]:
+            expected = [cli.evaluate(rego, i) for i in inputs]
+            self.assertEqual([server.evaluate(rego, i) for i in inputs], expected)
+            self.assertEqual(server.evaluate_batch(rego, inputs), expected)
+        
+        self.assertEqual(server.evaluate("package aws.scp\nallow := {", inputs[0]), Decision.ERROR)
+    
+    def test_server_prepare_compiles_policy_once(self):
+        """prepare uploads the policy so evaluations do not re-upload it"""
+        server = create_opa_runner(opa_path=OPA_BINARY, backend="server")
+        self.addCleanup(server.close)
+        
+        server.prepare(self.REGO)
+        loaded = server._loaded_policy
+        self.assertIsNotNone(loaded)
+        
+        server.evaluate(self.REGO, TestCase(action="s3:DeleteBucket", resource="*").to_opa_input())
+        self.assertEqual(server._loaded_policy, loaded)
+        
+        # A policy OPA rejects is reported per evaluation, not by prepare
+        server.prepare("package aws.scp\nallow := {")
+        self.assertEqual(server._loaded_policy, loaded)
+    
+    def test_server_queries_survive_restart(self):
+        """Query helper modules are uploaded again after the server is restarted"""
+        server = create_opa_runner(opa_path=OPA_BINARY, backend="server")
+        self.addCleanup(server.close)
+        
+        for query, result_type, action, expected in [
+            ("data.aws.scp.deny", RegoResultType.DENY_SET, "s3:DeleteBucket", Decision.DENY),
+            ("data.aws.scp.allow", RegoResultType.ALLOW_BOOL, "s3:GetObject", Decision.ALLOW)
+        ]:
+            test_input = TestCase(action=action, resource="*").to_opa_input()
+            self.assertEqual(server.evaluate(self.REGO, test_input, query, result_type), expected)
+            server.close()
+            server._decision_cache.clear()
+            self.assertEqual(server.evaluate_batch(self.REGO, [test_input], query, result_type), [expected])
+
+
+class TestOPAResultCache(unittest.TestCase):
+    """Test memoization of syntax checks and decisions by content hash"""
+    
+    def _counting_runner(self, cache_dir=None):
+        runner = OPARunner(cache_dir=cache_dir)
+        runner.calls = {"syntax": 0, "evaluate": 0}
+        
+        def check_syntax(rego_code):
+            runner.calls["syntax"] += 1
+            return SyntaxCheckResult(valid=True)
+        
+        def evaluate_batch(rego_code, inputs, query, result_type):
+            runner.calls["evaluate"] += len(inputs)
+            return [Decision.DENY if i["action"] == "s3:DeleteBucket" else Decision.ALLOW for i in inputs]
+        
+        runner._check_syntax = check_syntax
+        runner._evaluate_batch = evaluate_batch
+        runner._evaluate = lambda rego_code, i, query, result_type: evaluate_batch(rego_code, [i], query, result_type)[0]
+        return runner
+    
+    def test_repeated_work_is_memoized(self):
+        """Identical rego and inputs (in any key order) only reach OPA once"""
+        runner = self._counting_runner()
+        rego = "package aws.scp\n"
+        
+        runner.check_syntax(rego)
+        runner.check_syntax(rego)
+        self.assertEqual(runner.calls["syntax"], 1)
+        
+        first = {"action": "s3:DeleteBucket", "resource": "*"}
+        reordered = {"resource": "*", "action": "s3:DeleteBucket"}
+        other = {"action": "s3:GetObject", "resource": "*"}
+        
+        self.assertEqual(runner.evaluate(rego, first), Decision.DENY)
+        self.assertEqual(runner.evaluate_batch(rego, [reordered, other, other]),
+                         [Decision.DENY, Decision.ALLOW, Decision.ALLOW])
+        self.assertEqual(runner.calls["evaluate"], 3)
+        self.assertEqual(runner.evaluate_batch(rego, [first, other]), [Decision.DENY, Decision.ALLOW])
+        self.assertEqual(runner.calls["evaluate"], 3)
+        
+        # A different query is a different cache entry
+        runner.evaluate(rego, first, query="data.aws.scp.allow")
+        self.assertEqual(runner.calls["evaluate"], 4)
+    
+    def test_cache_persists_to_disk(self):
+        """save_cache writes results that a new runner reuses"""
+        import tempfile
+        
+        rego = "package aws.scp\n"
+        inputs = [{"action": "s3:DeleteBucket"}, {"action": "s3:GetObject"}]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = self._counting_runner(cache_dir=tmp)
+            runner.check_syntax(rego)
+            expected = runner.evaluate_batch(rego, inputs)
+            runner.save_cache()
+            
+            warm = self._counting_runner(cache_dir=tmp)
+            self.assertTrue(warm.check_syntax(rego).valid)
+            self.assertEqual(warm.evaluate_batch(rego, inputs), expected)
+            self.assertEqual(warm.calls, {"syntax": 0, "evaluate": 0})
+    
+    def test_cache_from_other_opa_version_ignored(self):
+        """A cache saved by a different OPA version is not reused"""
+        import tempfile
+        
+        rego = "package aws.scp\n"
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = self._counting_runner(cache_dir=tmp)
+            runner.opa_version = "Version: 0.0.1"
+            runner.check_syntax(rego)
+            runner.save_cache()
+            
+            upgraded = self._counting_runner(cache_dir=tmp)
+            upgraded.check_syntax(rego)
+            self.assertEqual(upgraded.calls["syntax"], 1)
+    
+    def test_failed_syntax_check_not_cached(self):
+        """An 'opa check' that times out is reported but retried, and never saved"""
+        import subprocess
+        import tempfile
+        
+        rego = "package aws.scp\n"
+        outcomes = [subprocess.TimeoutExpired(cmd="opa check", timeout=10),
+                    subprocess.CompletedProcess(args=[], returncode=0, stdout=b"", stderr=b"")]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            runner = OPARunner(cache_dir=tmp)
+            with mock.patch.object(scp_validation.subprocess, "run", side_effect=outcomes) as run:
+                first = runner.check_syntax(rego)
+                self.assertFalse(first.valid)
+                self.assertIn("Syntax check failed", first.error_message)
+                runner.save_cache()
+                self.assertEqual(OPARunner(cache_dir=tmp)._syntax_cache, {})
+                
+                self.assertTrue(runner.check_syntax(rego).valid)
+                self.assertTrue(runner.check_syntax(rego).valid)
+                self.assertEqual(run.call_count, 2)
+
+
+class TestCompiledPolicy(unittest.TestCase):
+    """Test that SCP policies are compiled once into parallel arrays"""
+    
+    def test_invalid_statements_are_dropped(self):
+        """Statements with Action and NotAction are excluded at compile time"""
+        scp = {
+            "Statement": [
+                {"Effect": "Deny", "Action": "s3:*", "NotAction": "s3:GetObject", "Resource": "*"},
+                {"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}
+            ]
+        }
+        
+        policy = CompiledPolicy.compile(scp)
+        self.assertEqual(policy.effects, [_EFFECT_CODES[Effect.ALLOW.value]])
+        self.assertEqual(policy.action_patterns, [["s3:GetObject"]])
+        self.assertEqual(policy.not_action_patterns, [None])
+    
+    def test_compiled_policy_matches_raw_evaluation(self):
+        """Evaluating a CompiledPolicy gives the same decision as the raw document"""
+        scp = {
+            "Statement": [
+                {"Effect": "Allow", "Action": "*", "Resource": "*"},
+                {"Effect": "Deny", "NotAction": ["iam:Get*"], "Resource": "arn:aws:iam::*:user/*"}
+            ]
+        }
+        evaluator = SCPEvaluator()
+        policy = evaluator.compile(scp)
+        self.assertIs(policy, evaluator.compile(scp))
+        
+        for action, resource in [("iam:GetUser", "arn:aws:iam::1:user/a"),
+                                 ("iam:DeleteUser", "arn:aws:iam::1:user/a"),
+                                 ("iam:DeleteUser", "arn:aws:s3:::bucket")]:
+            test_case = TestCase(action=action, resource=resource)
+            self.assertEqual(evaluator.evaluate(policy, test_case),
+                             SCPEvaluator().evaluate(scp, test_case))
+    
+    def test_identical_policies_share_compilation(self):
+        """Equal documents compile once, even as distinct objects"""
+        scp = {"Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}]}
+        reloaded = json.loads(json.dumps(scp))
+        
+        self.assertIs(SCPEvaluator().compile(scp), SCPEvaluator().compile(reloaded))
+        self.assertIsNot(SCPEvaluator().compile(scp),
+                         SCPEvaluator().compile({"Statement": [{"Effect": "Deny", "Action": "s3:*"}]}))
+    
+    def test_mutated_policy_recompiled(self):
+        """Compilation follows the document's content, not its identity"""
+        evaluator = SCPEvaluator()
+        scp = {"Statement": [{"Effect": "Allow", "Action": "s3:*", "Resource": "*"}]}
+        test_case = TestCase(action="s3:GetObject", resource="*")
+        self.assertEqual(evaluator.evaluate(scp, test_case), Decision.ALLOW)
+        
+        scp["Statement"][0]["Effect"] = "Deny"
+        self.assertEqual(evaluator.evaluate(scp, test_case), Decision.DENY)
+    
+    def test_action_list_compiled_to_single_regex(self):
+        """A multi-pattern Action list matches exactly like per-pattern matching"""
+        actions = ["s3:GetObject", "ec2:*Instances", "iam:Get*", "kms:Decrypt"]
+        scp = {"Statement": [{"Effect": "Allow", "Action": actions, "Resource": []}]}
+        
+        policy = CompiledPolicy.compile(scp)
+        evaluator = SCPEvaluator()
+        
+        for action in ["s3:GetObject", "s3:GetObjectAcl", "ec2:TerminateInstances",
+                       "iam:GetRole", "kms:decrypt", "kms:Decrypt"]:
+            expected = any(evaluator._matches_pattern(action, a) for a in actions)
+            self.assertEqual(policy.action_regexes[0].fullmatch(action) is not None, expected)
+        
+        # An empty pattern list matches nothing
+        self.assertIsNone(policy.resource_regexes[0].fullmatch(""))
+    
+    def test_statements_indexed_by_service(self):
+        """Only statements that can name the action's service are candidates"""
+        scp = {
+            "Statement": [
+                {"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "*"},
+                {"Effect": "Deny", "NotAction": "iam:*", "Resource": "*"},
+                {"Effect": "Allow", "Action": ["ec2:*", "s3*"], "Resource": "*"},
+                {"Effect": "Allow", "Action": "*:Get*", "Resource": "*"}
+            ]
+        }
+        policy = CompiledPolicy.compile(scp)
+        
+        self.assertEqual(policy.statements_for("s3:GetObject"), ([0, 1], [2, 3]))
+        self.assertEqual(policy.statements_for("ec2:RunInstances"), ([1], [2, 3]))
+        self.assertEqual(policy.statements_for("iam:GetRole"), ([1], [2, 3]))
+        self.assertEqual(policy.statements_for("kms:Decrypt"), ([1], [2, 3]))
+    
+    def test_evaluate_batch_matches_per_case_evaluation(self):
+        """Batch evaluation gives the same decisions as evaluating each case"""
+        scp = {
+            "Statement": [
+                {"Effect": "Allow", "Action": ["s3:*", "ec2:Describe*"], "Resource": "*"},
+                {"Effect": "Deny", "Action": "s3:Delete*", "Resource": "arn:aws:s3:::prod-*"},
+                {"Effect": "Deny", "NotAction": "s3:*", "Resource": "*",
+                 "Condition": {"StringNotEquals": {"aws:RequestedRegion": "us-east-1"}}}
+            ]
+        }
+        evaluator = SCPEvaluator()
+        test_cases = list(TestCaseGenerator().iter_from_scp(scp))
+        test_cases += [
+            TestCase(action="ec2:DescribeInstances", resource="*", context={"aws:RequestedRegion": "us-east-1"}),
+            TestCase(action="ec2:DescribeInstances", resource="*", context={"aws:RequestedRegion": "eu-west-1"}),
+            TestCase(action="s3:DeleteBucket", resource="arn:aws:s3:::dev-bucket"),
+            TestCase(action="ec2:DescribeInstances", resource="*", context={"aws:RequestedRegion": ["us-east-1"]}),
+            TestCase(action="ec2:DescribeVpcs", resource="*", context={"aws:RequestedRegion": "eu-west-1"})
+        ]
+        
+        self.assertEqual(evaluator.evaluate_batch(scp, test_cases),
+                         [evaluator.evaluate(scp, tc) for tc in test_cases])
+        self.assertEqual(evaluator.evaluate_batch(scp, []), [])
+
+
+class TestConditionEvaluation(unittest.TestCase):
+    """Test condition operators evaluated through the compiled dispatch table"""
+    
+    def _scp(self, condition):
+        return {
+            "Statement": [{
+                "Effect": "Allow",
+                "Action": "*",
+                "Resource": "*",
+                "Condition": condition
+            }]
+        }
+    
+    def test_string_like_wildcards(self):
+        """StringLike should match wildcard patterns"""
+        evaluator = SCPEvaluator()
+        scp = self._scp({"StringLike": {"aws:PrincipalArn": "arn:aws:iam::*:role/admin-*"}})
+        
+        admin = TestCase(action="s3:GetObject", resource="*",
+                         context={"aws:PrincipalArn": "arn:aws:iam::123:role/admin-ops"})
+        self.assertEqual(evaluator.evaluate(scp, admin), Decision.ALLOW)
+        
+        dev = TestCase(action="s3:GetObject", resource="*",
+                       context={"aws:PrincipalArn": "arn:aws:iam::123:role/dev"})
+        self.assertEqual(evaluator.evaluate(scp, dev), Decision.DENY)
+    
+    def test_numeric_conditions(self):
+        """Numeric operators should compare against parsed condition values"""
+        evaluator = SCPEvaluator()
+        scp = self._scp({"NumericLessThan": {"s3:max-keys": ["10"]}})
+        
+        low = TestCase(action="s3:ListBucket", resource="*", context={"s3:max-keys": "5"})
+        self.assertEqual(evaluator.evaluate(scp, low), Decision.ALLOW)
+        
+        high = TestCase(action="s3:ListBucket", resource="*", context={"s3:max-keys": "50"})
+        self.assertEqual(evaluator.evaluate(scp, high), Decision.DENY)
+        
+        invalid = TestCase(action="s3:ListBucket", resource="*", context={"s3:max-keys": "many"})
+        self.assertEqual(evaluator.evaluate(scp, invalid), Decision.DENY)
+    
+    def test_numeric_value_lists(self):
+        """NumericEquals matches any listed value, GreaterThan compares to the largest"""
+        evaluator = SCPEvaluator()
+        equals = self._scp({"NumericEquals": {"s3:max-keys": ["10", "20", "0"]}})
+        for value, expected in [("20", Decision.ALLOW), ("0", Decision.ALLOW), ("15", Decision.DENY)]:
+            case = TestCase(action="s3:ListBucket", resource="*", context={"s3:max-keys": value})
+            self.assertEqual(evaluator.evaluate(equals, case), expected, value)
+        
+        greater = self._scp({"NumericGreaterThan": {"s3:max-keys": ["0", "-5"]}})
+        for value, expected in [("1", Decision.ALLOW), ("0", Decision.DENY), ("-1", Decision.DENY)]:
+            case = TestCase(action="s3:ListBucket", resource="*", context={"s3:max-keys": value})
+            self.assertEqual(evaluator.evaluate(greater, case), expected, value)
+    
+    def test_conditions_checked_cheapest_first(self):
+        """Condition programs run set lookups before numeric and wildcard checks"""
+        program = scp_validation._compile_condition_block({
+            "StringLike": {"aws:PrincipalArn": "arn:aws:iam::*:role/admin-*"},
+            "NumericLessThan": {"s3:max-keys": "10"},
+            "StringEquals": {"aws:RequestedRegion": "us-east-1"},
+        })
+        self.assertEqual([key for key, _, _ in program],
+                         ["aws:RequestedRegion", "s3:max-keys", "aws:PrincipalArn"])
+    
+    def test_bool_condition(self):
+        """Bool should compare the normalized string form of the context value"""
+        evaluator = SCPEvaluator()
+        scp = self._scp({"Bool": {"aws:SecureTransport": "true"}})
+        
+        secure = TestCase(action="s3:GetObject", resource="*", context={"aws:SecureTransport": True})
+        self.assertEqual(evaluator.evaluate(scp, secure), Decision.ALLOW)
+        
+        insecure = TestCase(action="s3:GetObject", resource="*", context={"aws:SecureTransport": "false"})
+        self.assertEqual(evaluator.evaluate(scp, insecure), Decision.DENY)
+
+    def test_bool_condition_empty_values(self):
+        """A Bool condition with no values compiles and is never satisfied"""
+        evaluator = SCPEvaluator()
+        scp = self._scp({"Bool": {"aws:SecureTransport": []}})
+
+        for value in (True, "false"):
+            case = TestCase(action="s3:GetObject", resource="*", context={"aws:SecureTransport": value})
+            self.assertEqual(evaluator.evaluate(scp, case), Decision.DENY, value)
+
+    def test_conditions_compiled_once(self):
+        """The same condition block should be compiled once and reused"""
+        evaluator = SCPEvaluator()
+        conditions = {"StringEquals": {"aws:RequestedRegion": ["us-east-1", "us-west-2"]}}
+        
+        first = evaluator._compile_conditions(conditions)
+        second = evaluator._compile_conditions(conditions)
+        self.assertIs(first, second)
+        self.assertTrue(evaluator._evaluate_conditions(conditions, {"aws:RequestedRegion": "us-west-2"}))
+        self.assertFalse(evaluator._evaluate_conditions(conditions, {"aws:RequestedRegion": "eu-west-1"}))
+
+
 class TestComplexScenarios(unittest.TestCase):
     """Test complex real-world scenarios"""
     
@@ -631,6 +1144,340 @@ class TestTestCaseGeneration(unittest.TestCase):
         
         self.assertGreater(len(positive), 0, "Should have positive NotResource tests")
         self.assertGreater(len(negative), 0, "Should have negative NotResource tests")
+    
+    def test_iter_from_scp_is_lazy_and_matches_list(self):
+        """Streaming generation should yield the same cases as the list API"""
+        scp = {
+            "Statement": [
+                {"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "*"},
+                {"Effect": "Allow", "NotAction": ["iam:*"], "Resource": "*"}
+            ]
+        }
+        
+        generator = TestCaseGenerator()
+        stream = generator.iter_from_scp(scp)
+        
+        self.assertFalse(isinstance(stream, list))
+        self.assertEqual(list(stream), generator.generate_from_scp(scp))
+    
+    def test_condition_cases_not_repeated_per_operator(self):
+        """Operators on the same key share their identical condition cases"""
+        scp = {
+            "Statement": [{
+                "Effect": "Deny",
+                "Action": "ec2:RunInstances",
+                "Resource": "*",
+                "Condition": {
+                    "StringNotEquals": {"aws:RequestedRegion": "us-east-1"},
+                    "StringNotLike": {"aws:RequestedRegion": "us-east-1", "aws:PrincipalTag/team": "ops"}
+                }
+            }]
+        }
+        
+        cases = [tc for tc in TestCaseGenerator().generate_from_scp(scp) if tc.context]
+        contexts = [json.dumps(tc.context, sort_keys=True) for tc in cases]
+        
+        self.assertEqual(len(contexts), len(set(contexts)))
+        self.assertEqual(len(cases), 4)
+
+
+class TestStreamingValidation(unittest.TestCase):
+    """Test the fused generate/evaluate/compare pipeline"""
+    
+    @staticmethod
+    def _stub_rego(validator, evaluate_batch):
+        """Replace OPA with a synchronous evaluate_batch(rego_code, inputs) function"""
+        async def evaluate_batch_async(rego_code, inputs):
+            return evaluate_batch(rego_code, inputs)
+        validator.opa_runner.evaluate_batch = evaluate_batch
+        validator.opa_runner.evaluate_batch_async = evaluate_batch_async
+    
+    def test_report_counts_updated_incrementally(self):
+        """Counters should cover every generated case across batches"""
+        scp = {
+            "Statement": [
+                {"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "*"},
+                {"Effect": "Allow", "Action": "*", "Resource": "*"}
+            ]
+        }
+        
+        validator = SCPValidator()
+        validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+        self._stub_rego(validator, lambda rego_code, inputs: [Decision.ALLOW] * len(inputs))
+        
+        report = validator.validate_policy_streaming("streamed", scp, "", batch_size=2)
+        expected = validator.test_generator.generate_from_scp(scp)
+        
+        self.assertEqual(report.total_tests, len(expected))
+        self.assertEqual(len(report.comparison_results), len(expected))
+        self.assertEqual(report.passed_tests + report.failed_tests, report.total_tests)
+        self.assertGreater(report.failed_tests, 0, "Deny cases should not match an always-Allow Rego")
+    
+    def test_duplicate_cases_evaluated_once(self):
+        """Identical inputs are evaluated once but every case is reported"""
+        scp = {
+            "Statement": [
+                {"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "*"},
+                {"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "*"}
+            ]
+        }
+        
+        validator = SCPValidator()
+        validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+        evaluated = []
+        
+        def evaluate_batch(rego_code, inputs):
+            evaluated.extend(inputs)
+            return [Decision.DENY] * len(inputs)
+        
+        self._stub_rego(validator, evaluate_batch)
+        
+        report = validator.validate_policy_streaming("dupes", scp, "", batch_size=3)
+        expected = validator.test_generator.generate_from_scp(scp)
+        unique_inputs = {json.dumps(tc.to_opa_input(), sort_keys=True) for tc in expected}
+        
+        self.assertEqual(report.total_tests, len(expected))
+        self.assertEqual(len(evaluated), len(unique_inputs))
+        self.assertLess(len(evaluated), len(expected))
+    
+    def test_concurrent_batches_recorded_in_order(self):
+        """Batches finishing out of order are still reported in generation order"""
+        import asyncio
+        
+        scp = {"Statement": [{"Effect": "Deny", "Action": ["s3:DeleteBucket", "s3:PutObject"], "Resource": "*"}]}
+        
+        validator = SCPValidator(max_concurrency=4)
+        validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+        delays = iter([0.03, 0.02, 0.01, 0.0] * 100)
+        
+        async def evaluate_batch_async(rego_code, inputs):
+            await asyncio.sleep(next(delays))
+            return [Decision.DENY] * len(inputs)
+        
+        validator.opa_runner.evaluate_batch_async = evaluate_batch_async
+        
+        report = validator.validate_policy_streaming("ordered", scp, "", batch_size=1)
+        expected = validator.test_generator.generate_from_scp(scp)
+        
+        self.assertEqual(
+            [r.test_case.to_opa_input() for r in report.comparison_results],
+            [tc.to_opa_input() for tc in expected]
+        )
+    
+    def test_streaming_inside_running_event_loop(self):
+        """Called from a coroutine, batches are compared without nesting asyncio.run"""
+        import asyncio
+        
+        scp = {"Statement": [{"Effect": "Deny", "Action": "s3:DeleteBucket", "Resource": "*"}]}
+        
+        validator = SCPValidator()
+        validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+        self._stub_rego(validator, lambda rego_code, inputs: [Decision.DENY] * len(inputs))
+        
+        async def validate():
+            return validator.validate_policy_streaming("in-loop", scp, "", batch_size=2)
+        
+        report = asyncio.run(validate())
+        expected = validator.test_generator.generate_from_scp(scp)
+        
+        self.assertEqual(
+            [r.test_case.to_opa_input() for r in report.comparison_results],
+            [tc.to_opa_input() for tc in expected]
+        )
+        self.assertEqual(report.passed_tests, report.total_tests)
+    
+    def test_unchanged_passing_policies_skipped(self):
+        """With a cache dir, only changed or previously failing policies are revalidated"""
+        import tempfile
+        from pathlib import Path
+        
+        scp = {"Statement": [{"Effect": "Allow", "Action": "s3:GetObject", "Resource": "*"}]}
+        
+        with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as cache:
+            for i in range(2):
+                Path(tmp, f"policy{i}.json").write_text(json.dumps(scp))
+                Path(tmp, f"policy{i}.rego").write_text("package aws.scp\n")
+            
+            def run(force=False):
+                validator = SCPValidator(scp_dir=tmp, rego_dir=tmp, cache_dir=cache)
+                validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+                validated = []
+                
+                def evaluate_batch(rego_code, inputs):
+                    validated.append(rego_code)
+                    return [Decision.ALLOW if b'"s3:GetObject"' in i else Decision.DENY for i in inputs]
+                
+                self._stub_rego(validator, evaluate_batch)
+                reports = validator.validate_all_policies(max_workers=1, force=force)
+                validator.save_results()
+                return reports, set(validated)
+            
+            first, validated = run()
+            self.assertEqual(validated, {"package aws.scp\n"})
+            self.assertTrue(all(r.failed_tests == 0 for r in first))
+            
+            Path(tmp, "policy1.rego").write_text("package aws.scp\n\n")
+            second, validated = run()
+            self.assertEqual(validated, {"package aws.scp\n\n"})
+            self.assertEqual([(r.total_tests, r.passed_tests) for r in second],
+                             [(r.total_tests, r.passed_tests) for r in first])
+            
+            _, validated = run(force=True)
+            self.assertEqual(validated, {"package aws.scp\n", "package aws.scp\n\n"})
+            
+            # a changed validator invalidates earlier passes too
+            with mock.patch.object(scp_validation, "_validator_sha", lambda: "changed"):
+                _, validated = run()
+            self.assertEqual(validated, {"package aws.scp\n", "package aws.scp\n\n"})
+    
+    def test_progress_logged_not_printed(self):
+        """Progress lines go to the progress logger, buffered per policy when parallel"""
+        import tempfile
+        from pathlib import Path
+        
+        scp = {"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(2):
+                Path(tmp, f"policy{i}.json").write_text(json.dumps(scp))
+                Path(tmp, f"policy{i}.rego").write_text("package aws.scp\n")
+            
+            validator = SCPValidator(scp_dir=tmp, rego_dir=tmp)
+            validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+            self._stub_rego(validator, lambda rego_code, inputs: [Decision.ALLOW] * len(inputs))
+            
+            stdout = io.StringIO()
+            with self.assertLogs(scp_validation.progress_logger, level="INFO") as logs, \
+                    contextlib.redirect_stdout(stdout):
+                validator.validate_all_policies(max_workers=2)
+        
+        self.assertEqual(stdout.getvalue(), "")
+        policy_records = [r.getMessage() for r in logs.records if "[1/3]" in r.getMessage()]
+        self.assertEqual(len(policy_records), 2)
+        for message in policy_records:
+            self.assertIn("[1/3] Checking Rego syntax", message)
+            self.assertIn("Completed:", message)
+            self.assertIn("Validation Report:", message)
+    
+    def test_server_backend_validates_one_policy_at_a_time(self):
+        """The OPA server holds one policy, so policies are not validated in parallel"""
+        import tempfile
+        import threading
+        import time
+        from pathlib import Path
+        
+        scp = {"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(4):
+                Path(tmp, f"policy{i}.json").write_text(json.dumps(scp))
+                Path(tmp, f"policy{i}.rego").write_text(f"package aws.scp\n# {i}\n")
+            
+            validator = SCPValidator(scp_dir=tmp, rego_dir=tmp, opa_backend="server")
+            validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+            validator.opa_runner.prepare = lambda rego_code, query=None: None
+            lock = threading.Lock()
+            running = []
+            overlaps = []
+            
+            def evaluate_batch(rego_code, inputs):
+                with lock:
+                    running.append(rego_code)
+                    overlaps.append(len(set(running)))
+                time.sleep(0.01)
+                with lock:
+                    running.remove(rego_code)
+                return [Decision.ALLOW] * len(inputs)
+            
+            self._stub_rego(validator, evaluate_batch)
+            reports = validator.validate_all_policies(max_workers=4)
+        
+        self.assertEqual(len(reports), 4)
+        self.assertEqual(max(overlaps), 1)
+    
+    def test_progress_reaches_stdout_without_logging_setup(self):
+        """Library callers see progress without configuring logging"""
+        import tempfile
+        from pathlib import Path
+        
+        scp = {"Statement": [{"Effect": "Allow", "Action": "*", "Resource": "*"}]}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            Path(tmp, "policy.json").write_text(json.dumps(scp))
+            Path(tmp, "policy.rego").write_text("package aws.scp\n")
+            
+            validator = SCPValidator(scp_dir=tmp, rego_dir=tmp)
+            validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+            self._stub_rego(validator, lambda rego_code, inputs: [Decision.ALLOW] * len(inputs))
+            
+            stdout = io.StringIO()
+            with contextlib.redirect_stdout(stdout):
+                validator.validate_all_policies(max_workers=1)
+        
+        self.assertIn("Found 1 SCP policies to validate", stdout.getvalue())
+        self.assertIn("Validation Report: policy", stdout.getvalue())
+    
+    def test_fast_fail_stops_at_first_mismatch(self):
+        """With fast_fail, validation stops at the first mismatching case and policy"""
+        import tempfile
+        from pathlib import Path
+        
+        scp = {"Statement": [{"Effect": "Deny", "Action": ["s3:DeleteBucket", "s3:PutObject"], "Resource": "*"}]}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(3):
+                Path(tmp, f"policy{i}.json").write_text(json.dumps(scp))
+                Path(tmp, f"policy{i}.rego").write_text("package aws.scp\n")
+            
+            validator = SCPValidator(scp_dir=tmp, rego_dir=tmp, fast_fail=True)
+            validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+            self._stub_rego(validator, lambda rego_code, inputs: [Decision.ALLOW] * len(inputs))
+            
+            reports = validator.validate_all_policies(max_workers=1)
+        
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[0].failed_tests, 1)
+        self.assertLess(reports[0].total_tests, len(validator.test_generator.generate_from_scp(scp)))
+    
+    def test_validate_all_policies_in_parallel(self):
+        """Parallel validation returns one report per policy, in file order"""
+        import tempfile
+        from pathlib import Path
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(4):
+                scp = {"Statement": [{"Effect": "Allow", "Action": f"s3:Action{i}", "Resource": "*"}]}
+                Path(tmp, f"policy{i}.json").write_text(json.dumps(scp))
+                Path(tmp, f"policy{i}.rego").write_text("package aws.scp\n")
+            
+            validator = SCPValidator(scp_dir=tmp, rego_dir=tmp)
+            validator.opa_runner.check_syntax = lambda rego_code: SyntaxCheckResult(valid=True)
+            self._stub_rego(validator, lambda rego_code, inputs: [Decision.DENY] * len(inputs))
+            
+            reports = validator.validate_all_policies(max_workers=3)
+            expected_names = [f.stem for f in Path(tmp).glob("*.json")]
+        
+        self.assertEqual([r.policy_name for r in reports], expected_names)
+        for report in reports:
+            self.assertGreater(report.total_tests, 0)
+            self.assertEqual(report.passed_tests + report.failed_tests, report.total_tests)
+
+    
+    def test_policy_files_reread_only_when_changed(self):
+        """Policy files are cached until their modification stamp changes"""
+        import tempfile
+        from pathlib import Path
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp, "policy.rego")
+            path.write_text("package aws.scp\n")
+            first = scp_validation._load_file(path, text=True)
+            self.assertIs(scp_validation._load_file(path, text=True), first)
+            
+            path.write_text("package aws.scp\n\ndefault allow := false\n")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertIn("default allow", scp_validation._load_file(path, text=True))
 
 
 def run_tests():